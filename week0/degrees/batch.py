@@ -0,0 +1,143 @@
+"""
+Batch degrees queries.
+
+Reads a CSV file of (source, target) pairs, given either as names or,
+with --ids, as IMDB person ids, and writes one JSON result per line in
+the same order. Queries are spread over a process pool. The graph is
+loaded once in the parent: forked workers inherit it, and otherwise
+every worker memory-maps the same snapshot, so all of them share a
+single read-only copy of the data.
+
+Usage: python batch.py directory queries [--ids] [--workers N]
+           [--search {alt,bfs,bidirectional,tree}] [--output FILE]
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+
+import landmarks
+import search
+from snapshot import load_cached, load_snapshot
+
+# Graph shared by the worker processes
+graph = None
+
+
+def init_worker(directory, search_name):
+    """
+    Gives a worker process the graph, unless it inherited one on fork.
+    """
+    global graph
+    if graph is None:
+        graph = load_snapshot(directory) or load_cached(directory)
+        if search_name == "alt":
+            landmarks.attach(directory, graph)
+
+
+def resolve(value, ids):
+    """
+    Returns (person, error) for a query value, where person is a graph
+    index and error explains why no single person matched.
+    """
+    if ids:
+        person = graph.person_index(value)
+        if person is None:
+            return None, f"unknown person id {value!r}"
+        return person, None
+    matches = graph.people_named(value)
+    if len(matches) == 0:
+        return None, f"person {value!r} not found"
+    elif len(matches) > 1:
+        candidates = ", ".join(graph.person_ids[person] for person in matches)
+        return None, f"person {value!r} is ambiguous: {candidates}"
+    return matches[0], None
+
+
+def answer(query):
+    """
+    Answers one (source, target, ids, search name) query as a JSON line.
+    """
+    source_value, target_value, ids, search_name = query
+    result = {"source": source_value, "target": target_value}
+    source, error = resolve(source_value, ids)
+    if error is None:
+        target, error = resolve(target_value, ids)
+    if error is not None:
+        result["error"] = error
+        return json.dumps(result)
+
+    path = search.SEARCHES[search_name](graph, source, target)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [
+            {"movie_id": movie_id, "person_id": person_id}
+            for movie_id, person_id in graph.path_ids(path)
+        ]
+    return json.dumps(result)
+
+
+def read_queries(f, ids, search_name):
+    """
+    Yields queries from CSV rows of source and target, skipping blank rows.
+    """
+    for row in csv.reader(f):
+        if not row:
+            continue
+        if len(row) != 2:
+            raise ValueError(f"expected source and target, got {row!r}")
+        yield row[0].strip(), row[1].strip(), ids, search_name
+
+
+def run_batch(directory, queries, output, search_name, workers=None,
+              chunksize=16):
+    """
+    Answers queries over a pool of workers, writing each JSON line
+    to output as soon as it and all the results before it are ready.
+    """
+    global graph
+    graph = load_cached(directory)
+    if search_name == "alt":
+        landmarks.attach(directory, graph)
+    if workers == 1:
+        for query in queries:
+            print(answer(query), file=output)
+        return
+    with multiprocessing.Pool(workers, initializer=init_worker,
+                              initargs=(directory, search_name)) as pool:
+        for line in pool.imap(answer, queries, chunksize):
+            print(line, file=output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch degrees queries.")
+    parser.add_argument("directory")
+    parser.add_argument("queries",
+                        help="CSV file of source,target pairs ('-' for stdin)")
+    parser.add_argument("--ids", action="store_true",
+                        help="pairs are IMDB person ids rather than names")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--search", choices=sorted(search.SEARCHES),
+                        default="bidirectional",
+                        help="search strategy to use (default: bidirectional)")
+    parser.add_argument("--output", help="JSONL output file (default: stdout)")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.queries == "-" else \
+        open(args.queries, encoding="utf-8", newline="")
+    output = sys.stdout if args.output is None else \
+        open(args.output, "w", encoding="utf-8")
+    with source, output:
+        queries = read_queries(source, args.ids, args.search)
+        run_batch(args.directory, queries, output, args.search, args.workers)
+
+
+if __name__ == "__main__":
+    main()
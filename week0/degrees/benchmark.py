@@ -0,0 +1,354 @@
+"""
+Benchmarks for degrees.
+
+Usage:
+    python benchmark.py search [directory] [--pairs N] [--seed S]
+    python benchmark.py frontier [--max-size N]
+    python benchmark.py load [directory]
+    python benchmark.py landmarks [directory] [--pairs N] [-k K ...]
+    python benchmark.py names [directory] [--queries N]
+    python benchmark.py suite [--scale SCALE ...] [--queries N] [--seed S]
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+import landmarks
+from nameindex import NameIndex
+import search
+import snapshot
+import stats
+import synthetic
+from graph import load_graph
+from util import (Node, StackFrontier, QueueFrontier,
+                  DequeStackFrontier, DequeQueueFrontier)
+
+
+def count_expansions(dict_search, source, target):
+    """
+    Runs a search and returns (path, expansions, seconds), where an
+    expansion is one call to neighbors_for_person.
+    """
+    neighbors = degrees.neighbors_for_person
+    expansions = 0
+
+    def counting_neighbors(person_id):
+        nonlocal expansions
+        expansions += 1
+        return neighbors(person_id)
+
+    degrees.neighbors_for_person = counting_neighbors
+    try:
+        start = time.perf_counter()
+        path = dict_search(source, target)
+        elapsed = time.perf_counter() - start
+    finally:
+        degrees.neighbors_for_person = neighbors
+    return path, expansions, elapsed
+
+
+def compare_searches(pairs):
+    """
+    Runs every search strategy over the same person pairs and returns
+    a dict of search name -> (total expansions, total seconds).
+    """
+    totals = {name: [0, 0.0] for name in degrees.SEARCHES}
+    for source, target in pairs:
+        lengths = set()
+        for name, dict_search in degrees.SEARCHES.items():
+            path, expansions, elapsed = count_expansions(
+                dict_search, source, target)
+            totals[name][0] += expansions
+            totals[name][1] += elapsed
+            lengths.add(None if path is None else len(path))
+        if len(lengths) != 1:
+            raise Exception(f"searches disagree for {source} -> {target}")
+    return totals
+
+
+def time_graph_searches(graph, pairs):
+    """
+    Runs every compact graph search over the same person pairs and returns
+    a dict of search name -> total seconds.
+    """
+    pairs = [(graph.person_index(source), graph.person_index(target))
+             for source, target in pairs]
+    totals = {}
+    for name, graph_search in search.SEARCHES.items():
+        start = time.perf_counter()
+        for source, target in pairs:
+            graph_search(graph, source, target)
+        totals[name] = time.perf_counter() - start
+    return totals
+
+
+def measure_load(load, directory):
+    """
+    Returns (result, seconds, bytes allocated) for a loader.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load(directory)
+    elapsed = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, allocated
+
+
+def time_pops(frontier_class, size, pops=1000):
+    """
+    Fills a frontier with size nodes and returns the mean seconds
+    taken by each of the next pops removals.
+    """
+    frontier = frontier_class()
+    for state in range(size):
+        frontier.add(Node(state=state, parent=None, action=None))
+    pops = min(pops, size)
+    start = time.perf_counter()
+    for _ in range(pops):
+        frontier.remove()
+    return (time.perf_counter() - start) / pops
+
+
+def benchmark_search(args):
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    rng = random.Random(args.seed)
+    person_ids = sorted(degrees.people)
+    pairs = [(rng.choice(person_ids), rng.choice(person_ids))
+             for _ in range(args.pairs)]
+
+    totals = compare_searches(pairs)
+    print(f"{len(pairs)} random pairs")
+    for name, (expansions, elapsed) in totals.items():
+        print(f"{name:>14}: {expansions:>10} expansions, {elapsed:.3f}s")
+
+    graph = load_graph(args.directory)
+    search.landmark_indexes[graph] = landmarks.build_index(graph)
+    for name, elapsed in time_graph_searches(graph, pairs).items():
+        print(f"{'compact ' + name:>24}: {elapsed:.3f}s")
+
+
+def benchmark_frontier(args):
+    frontiers = [StackFrontier, QueueFrontier,
+                 DequeStackFrontier, DequeQueueFrontier]
+    print(f"{'size':>10}" + "".join(f"{f.__name__:>20}" for f in frontiers))
+    size = 1000
+    while size <= args.max_size:
+        row = f"{size:>10}"
+        for frontier_class in frontiers:
+            # the list-backed frontiers copy the whole list on every pop
+            if frontier_class in (StackFrontier, QueueFrontier) \
+                    and size > args.max_list_size:
+                row += f"{'-':>20}"
+                continue
+            row += f"{time_pops(frontier_class, size) * 1e6:>17.2f} us"
+        print(row)
+        size *= 10
+
+
+def benchmark_load(args):
+    _, elapsed, allocated = measure_load(degrees.load_data, args.directory)
+    print(f"{'load_data':>10}: {elapsed:.3f}s, {allocated / 2**20:.1f} MiB")
+    graph, elapsed, allocated = measure_load(load_graph, args.directory)
+    print(f"{'load_graph':>10}: {elapsed:.3f}s, {allocated / 2**20:.1f} MiB")
+    snapshot.compile_snapshot(args.directory, graph)
+    _, elapsed, allocated = measure_load(snapshot.load_snapshot,
+                                         args.directory)
+    print(f"{'snapshot':>10}: {elapsed:.3f}s, {allocated / 2**20:.1f} MiB")
+
+
+def benchmark_landmarks(args):
+    graph = snapshot.load_cached(args.directory)
+    rng = random.Random(args.seed)
+    pairs = [(rng.randrange(graph.person_count),
+              rng.randrange(graph.person_count))
+             for _ in range(args.pairs)]
+
+    def time_queries(graph_search):
+        start = time.perf_counter()
+        for source, target in pairs:
+            graph_search(graph, source, target)
+        return time.perf_counter() - start
+
+    baseline = time_queries(search.bfs)
+    bidirectional = time_queries(search.bidirectional_bfs)
+    print(f"{len(pairs)} random pairs, bfs: {baseline:.3f}s, "
+          f"bidirectional: {bidirectional:.3f}s")
+    print(f"{'k':>4}{'build':>10}{'size':>12}{'queries':>10}{'speedup':>9}")
+    for k in args.k:
+        start = time.perf_counter()
+        index = landmarks.build_index(graph, k)
+        build = time.perf_counter() - start
+        search.landmark_indexes[graph] = index
+        elapsed = time_queries(search.landmark_search)
+        print(f"{k:>4}{build:>9.2f}s{index.nbytes / 2**20:>8.1f} MiB"
+              f"{elapsed:>9.3f}s{baseline / elapsed:>8.1f}x")
+
+
+def misspell(name, rng):
+    """
+    Swaps two neighbouring characters of a name.
+    """
+    if len(name) < 2:
+        return name
+    i = rng.randrange(len(name) - 1)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def benchmark_names(args):
+    graph = snapshot.load_cached(args.directory)
+    index = NameIndex(graph)
+    rng = random.Random(args.seed)
+    names = [graph.names[rng.randrange(graph.person_count)]
+             for _ in range(args.queries)]
+    lookups = [
+        ("exact", index.exact, names),
+        ("prefix", index.prefix, [name[:3] for name in names]),
+        ("fuzzy", index.fuzzy, [misspell(name, rng) for name in names]),
+    ]
+    for label, lookup, queries in lookups:
+        start = time.perf_counter()
+        for query in queries:
+            lookup(query)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>8}: {elapsed / len(queries) * 1e3:.3f} ms per lookup")
+
+
+def run_suite_scale(directory, queries, seed):
+    """
+    Measures loading and every search strategy on one dataset and
+    returns the results as a dict of structured stats.
+    """
+    results = {}
+
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    with stats.collecting() as recorded:
+        with recorded.phase("total"):
+            degrees.load_data(directory)
+    results["load_data"] = recorded.as_dict()
+
+    with stats.collecting() as recorded:
+        with recorded.phase("total"):
+            graph = load_graph(directory)
+    results["load_graph"] = recorded.as_dict()
+
+    snapshot.compile_snapshot(directory, graph)
+    with stats.collecting() as recorded:
+        with recorded.phase("total"):
+            graph = snapshot.load_snapshot(directory)
+    results["load_snapshot"] = recorded.as_dict()
+
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    pairs = [(rng.choice(person_ids), rng.choice(person_ids))
+             for _ in range(queries)]
+
+    for name, dict_search in degrees.SEARCHES.items():
+        with stats.collecting() as recorded:
+            with recorded.phase("total"):
+                for source, target in pairs:
+                    dict_search(source, target)
+        results[f"dicts/{name}"] = recorded.as_dict()
+
+    search.landmark_indexes[graph] = landmarks.build_index(graph)
+    indices = [(graph.person_index(source), graph.person_index(target))
+               for source, target in pairs]
+    for name, graph_search in search.SEARCHES.items():
+        with stats.collecting() as recorded:
+            with recorded.phase("total"):
+                for source, target in indices:
+                    graph_search(graph, source, target)
+        results[f"compact/{name}"] = recorded.as_dict()
+    return results
+
+
+def benchmark_suite(args):
+    for scale in args.scale:
+        with tempfile.TemporaryDirectory() as directory:
+            synthetic.generate_scale(directory, scale, args.seed)
+            results = run_suite_scale(directory, args.queries, args.seed)
+        record = {
+            "scale": scale,
+            "size": dict(zip(("people", "movies", "cast"),
+                             synthetic.SCALES[scale])),
+            "queries": args.queries,
+            "seed": args.seed,
+            "results": results
+        }
+        print(json.dumps(record, sort_keys=True), file=args.output)
+        args.output.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser(
+        "search", help="compare search strategies on random person pairs")
+    command.add_argument("directory", nargs="?", default="large")
+    command.add_argument("--pairs", type=int, default=20,
+                         help="number of random person pairs (default: 20)")
+    command.add_argument("--seed", type=int, default=0)
+    command.set_defaults(run=benchmark_search)
+
+    command = commands.add_parser(
+        "frontier", help="time frontier removals as the frontier grows")
+    command.add_argument("--max-size", type=int, default=1000000,
+                         help="largest frontier to time (default: 1000000)")
+    command.add_argument("--max-list-size", type=int, default=100000,
+                         help="largest list-backed frontier to time "
+                              "(default: 100000)")
+    command.set_defaults(run=benchmark_frontier)
+
+    command = commands.add_parser(
+        "load", help="compare load time and memory of the loaders")
+    command.add_argument("directory", nargs="?", default="large")
+    command.set_defaults(run=benchmark_load)
+
+    command = commands.add_parser(
+        "landmarks", help="compare landmark index sizes with plain BFS")
+    command.add_argument("directory", nargs="?", default="large")
+    command.add_argument("--pairs", type=int, default=100,
+                         help="number of random person pairs (default: 100)")
+    command.add_argument("--seed", type=int, default=0)
+    command.add_argument("-k", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                         help="landmark counts to try (default: 1 2 4 8 16)")
+    command.set_defaults(run=benchmark_landmarks)
+
+    command = commands.add_parser(
+        "names", help="time exact, prefix and fuzzy name lookups")
+    command.add_argument("directory", nargs="?", default="large")
+    command.add_argument("--queries", type=int, default=1000,
+                         help="number of lookups of each kind (default: 1000)")
+    command.add_argument("--seed", type=int, default=0)
+    command.set_defaults(run=benchmark_names)
+
+    command = commands.add_parser(
+        "suite", help="measure loading and searches on synthetic datasets")
+    command.add_argument("--scale", nargs="+", choices=list(synthetic.SCALES),
+                         default=["tiny", "small"],
+                         help="dataset scales to run (default: tiny small)")
+    command.add_argument("--queries", type=int, default=50,
+                         help="random queries per search (default: 50)")
+    command.add_argument("--seed", type=int, default=0)
+    command.add_argument("--output", type=argparse.FileType("w"),
+                         default="-", help="JSONL results file "
+                                           "(default: stdout)")
+    command.set_defaults(run=benchmark_suite)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
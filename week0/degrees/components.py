@@ -0,0 +1,80 @@
+"""
+Connected components of the co-star graph.
+
+Two people are connected exactly when they share a component label, so
+unreachable queries can be answered without searching. Labels are
+computed once when a dataset is loaded and stored in its snapshot.
+
+Usage: python components.py [directory] [--top N]
+"""
+
+import argparse
+from array import array
+
+
+def label_components(person_count, movie_offsets, movie_stars):
+    """
+    Labels every person with a dense component number using union-find
+    over the casts of all movies. Components are numbered by their first
+    person. Returns (labels, sizes) arrays.
+    """
+    parent = array("I", range(person_count))
+
+    def find(person):
+        root = person
+        while parent[root] != root:
+            root = parent[root]
+        # compress the path so later finds are near constant time
+        while parent[person] != root:
+            parent[person], person = root, parent[person]
+        return root
+
+    for movie in range(len(movie_offsets) - 1):
+        start, end = movie_offsets[movie], movie_offsets[movie + 1]
+        if end - start < 2:
+            continue
+        first = find(movie_stars[start])
+        for i in range(start + 1, end):
+            root = find(movie_stars[i])
+            if root != first:
+                # hang the larger index under the smaller one
+                if root < first:
+                    root, first = first, root
+                parent[root] = first
+
+    labels = array("I", bytes(array("I").itemsize * person_count))
+    sizes = array("I")
+    numbers = {}
+    for person in range(person_count):
+        root = find(person)
+        number = numbers.get(root)
+        if number is None:
+            number = numbers[root] = len(sizes)
+            sizes.append(0)
+        labels[person] = number
+        sizes[number] += 1
+    return labels, sizes
+
+
+def main():
+    from snapshot import load_cached
+
+    parser = argparse.ArgumentParser(
+        description="Report connected components of a dataset.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--top", type=int, default=10,
+                        help="number of largest components to list")
+    args = parser.parse_args()
+
+    graph = load_cached(args.directory)
+    sizes = sorted(graph.component_sizes, reverse=True)
+    singletons = sum(1 for size in sizes if size == 1)
+    print(f"{graph.person_count} people in {len(sizes)} components "
+          f"({singletons} with no co-stars)")
+    for rank, size in enumerate(sizes[:args.top], 1):
+        share = 100 * size / graph.person_count
+        print(f"{rank:>4}: {size:>10} people ({share:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
+import argparse
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import landmarks
+import search
+import stats
+from nameindex import NameIndex
+from snapshot import load_cached
+from util import Node, DequeQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -18,59 +24,108 @@ def load_data(directory):
     Load data from CSV files into memory.
     """
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    with stats.phase("load_people"):
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                people[row["id"]] = {
+                    "name": row["name"],
+                    "birth": row["birth"],
+                    "movies": set()
+                }
+                if row["name"].lower() not in names:
+                    names[row["name"].lower()] = {row["id"]}
+                else:
+                    names[row["name"].lower()].add(row["id"])
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+    with stats.phase("load_movies"):
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                movies[row["id"]] = {
+                    "title": row["title"],
+                    "year": row["year"],
+                    "stars": set()
+                }
 
     # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    with stats.phase("load_stars"):
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    people[row["person_id"]]["movies"].add(row["movie_id"])
+                    movies[row["movie_id"]]["stars"].add(row["person_id"])
+                except KeyError:
+                    pass
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--search", choices=sorted(search.SEARCHES),
+                        default="bfs",
+                        help="search strategy to use (default: bfs)")
+    parser.add_argument("--dicts", action="store_true",
+                        help="use the dict-based loader and searches instead "
+                             "of the compact graph")
+    parser.add_argument("--stats", action="store_true",
+                        help="print search and load stats as JSON to stderr")
+    args = parser.parse_args()
+    if args.dicts and args.search not in SEARCHES:
+        parser.error(f"--search {args.search} is not available with --dicts")
+    directory = args.directory
+    if args.stats:
+        stats.current = stats.Stats()
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    with stats.phase("load"):
+        if args.dicts:
+            load_data(directory)
+        else:
+            graph = load_cached(directory)
+            if args.search == "alt":
+                landmarks.attach(directory, graph)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
-    if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
-    if target is None:
-        sys.exit("Person not found.")
+    if args.dicts:
+        source = person_id_for_name(input("Name: "))
+        if source is None:
+            sys.exit("Person not found.")
+        target = person_id_for_name(input("Name: "))
+        if target is None:
+            sys.exit("Person not found.")
+        with stats.phase("search"):
+            path = SEARCHES[args.search](source, target)
+        print_path(path, source,
+                   lambda person_id: people[person_id]["name"],
+                   lambda movie_id: movies[movie_id]["title"])
+    else:
+        source = person_for_name(graph, input("Name: "))
+        if source is None:
+            sys.exit("Person not found.")
+        target = person_for_name(graph, input("Name: "))
+        if target is None:
+            sys.exit("Person not found.")
+        with stats.phase("search"):
+            path = search.SEARCHES[args.search](graph, source, target)
+        print_path(path, source,
+                   lambda person: graph.names[person],
+                   lambda movie: graph.titles[movie])
+
+    if args.stats:
+        print(stats.current.as_json(), file=sys.stderr)
 
-    path = shortest_path(source, target)
 
+def print_path(path, source, name_of, title_of):
+    """
+    Prints a path of (movie, person) pairs starting at source, using
+    name_of and title_of to look up people and movies.
+    """
     if path is None:
         print("Not connected.")
     else:
@@ -78,9 +133,9 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = name_of(path[i][1])
+            person2 = name_of(path[i + 1][1])
+            movie = title_of(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
@@ -95,11 +150,14 @@ def shortest_path(source, target):
     # TODO
     # properly format initial node and initialise frontier
     initial = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
     frontier.add(initial)
+    expanded = peak = 0
     # run through all nodes in frontier through neighbors_for_person()
     while not frontier.empty():
+        peak = max(peak, len(frontier.frontier))
         node = frontier.remove()
+        frontier.explore(node.state)
         # if selected node is target, return all actions that lead to it
         if node.state == target:
             actions = []
@@ -107,15 +165,108 @@ def shortest_path(source, target):
                 actions.append(node.action)
                 node = node.parent
             actions = actions[::-1]
+            stats.record_search(expanded, 0, peak)
             return actions
         # else, keep searching for more adjacent stars and put into frontier
+        expanded += 1
         starring = neighbors_for_person(node.state)
         for star in starring:
+            # skip people already explored or waiting in the frontier
+            if frontier.is_explored(star[1]) or frontier.contains_state(star[1]):
+                continue
             new_node = Node(state=star[1], parent=node, action=(star[0], star[1]))
             frontier.add(new_node)
+    stats.record_search(expanded, 0, peak)
+    return None
+
+
+def shortest_path_bidirectional(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends at once.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # each side maps a reached person to the (movie_id, person_id) step
+    # that leads back towards its own root
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    expanded = peak = 0
+    while forward_frontier and backward_frontier:
+        peak = max(peak, len(forward_frontier) + len(backward_frontier))
+        # always grow the side with the smaller frontier
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, others = forward_frontier, forward, backward
+        else:
+            frontier, parents, others = backward_frontier, backward, forward
+
+        # expand the whole layer so the best meeting point in it is found,
+        # not just the first one
+        next_frontier = []
+        meeting = None
+        for person_id in frontier:
+            expanded += 1
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie_id, person_id)
+                next_frontier.append(neighbor)
+                if neighbor in others:
+                    length = _path_length(parents, neighbor) + \
+                        _path_length(others, neighbor)
+                    if meeting is None or length < meeting[0]:
+                        meeting = (length, neighbor)
+        if meeting is not None:
+            stats.record_search(expanded, 0, peak)
+            return _join_paths(forward, backward, meeting[1])
+
+        if parents is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+    stats.record_search(expanded, 0, peak)
     return None
 
 
+def _path_length(parents, person_id):
+    """
+    Returns the number of steps from person_id back to its search root.
+    """
+    length = 0
+    while parents[person_id] is not None:
+        person_id = parents[person_id][1]
+        length += 1
+    return length
+
+
+def _join_paths(forward, backward, meeting):
+    """
+    Stitches the forward and backward search trees together at the
+    meeting person into a list of (movie_id, person_id) pairs.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, previous = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, following = backward[person_id]
+        path.append((movie_id, following))
+        person_id = following
+    return path
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -142,6 +293,37 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_for_name(graph, name):
+    """
+    Returns the graph index for a person's name,
+    resolving ambiguities as needed.
+    """
+    matches = graph.people_named(name)
+    if len(matches) == 0:
+        suggestions = NameIndex(graph).search(name, limit=5)
+        if suggestions:
+            suggested = ", ".join(graph.names[person]
+                                  for person in suggestions)
+            print(f"Did you mean: {suggested}?")
+        return None
+    elif len(matches) > 1:
+        print(f"Which '{name}'?")
+        for person in matches:
+            person_id = graph.person_ids[person]
+            name = graph.names[person]
+            birth = graph.births[person]
+            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+        try:
+            person = graph.person_index(input("Intended Person ID: "))
+            if person in matches:
+                return person
+        except ValueError:
+            pass
+        return None
+    else:
+        return matches[0]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
@@ -152,8 +334,18 @@ def neighbors_for_person(person_id):
     for movie_id in movie_ids:
         for person_id in movies[movie_id]["stars"]:
             neighbors.add((movie_id, person_id))
+    stats.count("neighbor_sets")
+    stats.count("movies_scanned", len(movie_ids))
+    stats.count("neighbor_pairs", len(neighbors))
     return neighbors
 
 
+# Search strategies selectable from the command line
+SEARCHES = {
+    "bfs": shortest_path,
+    "bidirectional": shortest_path_bidirectional,
+}
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,302 @@
+"""
+Compact co-star graph for degrees.
+
+People and movies are interned into dense integer indices, ordered by
+IMDB id, and the bipartite person-movie graph is stored as two
+compressed sparse row (CSR) structures:
+
+    person_movies[person_offsets[p]:person_offsets[p + 1]]
+        the movies person p starred in
+    movie_stars[movie_offsets[m]:movie_offsets[m + 1]]
+        the people who starred in movie m
+
+Every column is a flat array, so the graph takes a fraction of the
+memory of the dict-of-sets representation in degrees.py and searches
+can walk it without building any intermediate sets.
+"""
+
+import csv
+from array import array
+
+import stats
+from components import label_components
+from nameindex import build_trigrams
+
+# Typecode for all index arrays (unsigned, 4 bytes on supported platforms)
+INDEX = "I"
+
+
+def id_key(imdb_id):
+    """
+    Sort key for IMDB ids, which orders numeric ids by value.
+    """
+    return (len(imdb_id), imdb_id)
+
+
+class StringTable():
+    """
+    Sequence of strings packed into a single UTF-8 buffer, where string
+    i is data[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        chunks = []
+        offsets = array("Q", [0])
+        position = 0
+        for string in strings:
+            chunk = string.encode("utf-8")
+            chunks.append(chunk)
+            position += len(chunk)
+            offsets.append(position)
+        return cls(b"".join(chunks), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Graph():
+    """
+    Integer-indexed person-movie graph stored as CSR arrays.
+    """
+
+    def __init__(self, person_ids, names, births, movie_ids, titles, years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 name_order, name_grams, name_gram_offsets, name_gram_people,
+                 name_gram_counts, component, component_sizes):
+        self.person_ids = person_ids
+        self.names = names
+        self.births = births
+        self.movie_ids = movie_ids
+        self.titles = titles
+        self.years = years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        # person indices sorted by lowercase name
+        self.name_order = name_order
+        # trigram index over names, see nameindex.py
+        self.name_grams = name_grams
+        self.name_gram_offsets = name_gram_offsets
+        self.name_gram_people = name_gram_people
+        self.name_gram_counts = name_gram_counts
+        # component[p] is the connected component of person p, which has
+        # component_sizes[component[p]] people in it
+        self.component = component
+        self.component_sizes = component_sizes
+
+    @property
+    def person_count(self):
+        return len(self.person_ids)
+
+    @property
+    def movie_count(self):
+        return len(self.movie_ids)
+
+    @property
+    def component_count(self):
+        return len(self.component_sizes)
+
+    def connected(self, person, other):
+        """
+        Returns True if there is a path between two people.
+        """
+        return self.component[person] == self.component[other]
+
+    def component_size(self, person):
+        """
+        Returns the number of people reachable from a person,
+        including the person.
+        """
+        return self.component_sizes[self.component[person]]
+
+    def person_index(self, person_id):
+        """
+        Returns the index of an IMDB person id, or None if unknown.
+        """
+        return _find_id(self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of an IMDB movie id, or None if unknown.
+        """
+        return _find_id(self.movie_ids, movie_id)
+
+    def people_named(self, name):
+        """
+        Returns the indices of all people with the given name,
+        ignoring case.
+        """
+        name = name.lower()
+        order = self.name_order
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.names[order[middle]].lower() < name:
+                low = middle + 1
+            else:
+                high = middle
+        matches = []
+        while low < len(order) and self.names[order[low]].lower() == name:
+            matches.append(order[low])
+            low += 1
+        return matches
+
+    def movies_of(self, person):
+        """
+        Returns the indices of the movies a person starred in.
+        """
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the indices of the people who starred in a movie.
+        """
+        offsets = self.movie_offsets
+        return self.movie_stars[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred
+        with a given person.
+        """
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+    def path_ids(self, path):
+        """
+        Converts a path of (movie, person) index pairs into
+        (movie_id, person_id) IMDB id pairs.
+        """
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+
+def _find_id(table, imdb_id):
+    """
+    Binary searches a StringTable of ids sorted by id_key.
+    """
+    key = id_key(imdb_id)
+    low, high = 0, len(table)
+    while low < high:
+        middle = (low + high) // 2
+        if id_key(table[middle]) < key:
+            low = middle + 1
+        else:
+            high = middle
+    if low < len(table) and table[low] == imdb_id:
+        return low
+    return None
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files into a compact Graph.
+    """
+    # Load people, interned in IMDB id order
+    with stats.phase("read_people"):
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            people = sorted(
+                ((row["id"], row["name"], row["birth"])
+                 for row in csv.DictReader(f)),
+                key=lambda person: id_key(person[0])
+            )
+        person_index = {person[0]: i for i, person in enumerate(people)}
+
+    # Load movies, interned in IMDB id order
+    with stats.phase("read_movies"):
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            movies = sorted(
+                ((row["id"], row["title"], row["year"])
+                 for row in csv.DictReader(f)),
+                key=lambda movie: id_key(movie[0])
+            )
+        movie_index = {movie[0]: i for i, movie in enumerate(movies)}
+
+    # Load stars as unique edges encoded as person * movie_count + movie,
+    # skipping rows that refer to unknown people or movies
+    movie_count = len(movies)
+    with stats.phase("read_stars"):
+        edges = set()
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person = person_index.get(row["person_id"])
+                movie = movie_index.get(row["movie_id"])
+                if person is not None and movie is not None:
+                    edges.add(person * movie_count + movie)
+        edges = sorted(edges)
+
+    with stats.phase("build_csr"):
+        person_offsets, person_movies = _build_csr(
+            len(people), ((edge // movie_count, edge % movie_count)
+                          for edge in edges))
+        movie_offsets, movie_stars = _build_csr(
+            movie_count, ((edge % movie_count, edge // movie_count)
+                          for edge in edges))
+
+    with stats.phase("index_names"):
+        name_order = array(INDEX, sorted(
+            range(len(people)), key=lambda i: people[i][1].lower()
+        ))
+        (name_grams, name_gram_offsets, name_gram_people,
+         name_gram_counts) = build_trigrams(p[1] for p in people)
+
+    with stats.phase("label_components"):
+        component, component_sizes = label_components(
+            len(people), movie_offsets, movie_stars)
+
+    return Graph(
+        person_ids=StringTable.from_strings(p[0] for p in people),
+        names=StringTable.from_strings(p[1] for p in people),
+        births=StringTable.from_strings(p[2] for p in people),
+        movie_ids=StringTable.from_strings(m[0] for m in movies),
+        titles=StringTable.from_strings(m[1] for m in movies),
+        years=StringTable.from_strings(m[2] for m in movies),
+        person_offsets=person_offsets,
+        person_movies=person_movies,
+        movie_offsets=movie_offsets,
+        movie_stars=movie_stars,
+        name_order=name_order,
+        name_grams=StringTable.from_strings(name_grams),
+        name_gram_offsets=name_gram_offsets,
+        name_gram_people=name_gram_people,
+        name_gram_counts=name_gram_counts,
+        component=component,
+        component_sizes=component_sizes
+    )
+
+
+def _build_csr(rows, pairs):
+    """
+    Builds CSR offsets and columns from (row, column) pairs.
+    Columns keep the order in which the pairs are given.
+    """
+    pairs = list(pairs)
+    offsets = array(INDEX, bytes(array(INDEX).itemsize * (rows + 1)))
+    for row, _ in pairs:
+        offsets[row + 1] += 1
+    for row in range(rows):
+        offsets[row + 1] += offsets[row]
+
+    columns = array(INDEX, bytes(array(INDEX).itemsize * len(pairs)))
+    fill = offsets[:-1]
+    for row, column in pairs:
+        columns[fill[row]] = column
+        fill[row] += 1
+    return offsets, columns
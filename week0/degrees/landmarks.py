@@ -0,0 +1,180 @@
+"""
+Landmark distance index for degrees.
+
+A handful of landmark people (by default the ones with the most co-star
+links) each get a full BFS distance array. By the triangle inequality,
+|d(L, p) - d(L, t)| <= d(p, t) <= d(L, p) + d(L, t) for every landmark L:
+search.landmark_search prunes people whose lower bound rules them out,
+and falls back on the path through the landmark with the least upper
+bound. The index is built once per dataset and saved next to the CSVs,
+where it is memory-mapped on load.
+
+Usage: python landmarks.py [directory] [-k K]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+from array import array
+
+import search
+from snapshot import layout, load_cached, source_stats
+
+LANDMARKS_NAME = "degrees.landmarks"
+LANDMARKS_VERSION = 1
+MAGIC = b"LANDMARK"
+
+# Distance stored for people a landmark cannot reach
+UNREACHED = search.UNREACHED
+
+# Number of landmarks built when none is given
+DEFAULT_LANDMARKS = 8
+
+
+class LandmarkIndex():
+    """
+    BFS distances from each landmark to every person, where rows[i][p]
+    is the distance from landmarks[i] to person p.
+    """
+
+    def __init__(self, landmarks, rows):
+        self.landmarks = landmarks
+        self.rows = rows
+
+    @property
+    def nbytes(self):
+        return sum(memoryview(row).nbytes for row in self.rows)
+
+
+def select_landmarks(graph, k):
+    """
+    Returns the k people with the most co-star links, in descending order.
+    """
+    def degree(person):
+        return sum(graph.movie_offsets[movie + 1] - graph.movie_offsets[movie]
+                   for movie in graph.movies_of(person))
+    return sorted(range(graph.person_count), key=degree, reverse=True)[:k]
+
+
+def build_index(graph, k=DEFAULT_LANDMARKS):
+    """
+    Builds a LandmarkIndex over k landmarks.
+    """
+    landmarks = select_landmarks(graph, k)
+    rows = []
+    for landmark in landmarks:
+        distance = search.bfs_tree(graph, landmark).distance
+        rows.append(array("H", (UNREACHED if d == search.UNSEEN else d
+                                for d in distance)))
+    return LandmarkIndex(landmarks, rows)
+
+
+def index_path(directory):
+    return os.path.join(directory, LANDMARKS_NAME)
+
+
+def save_index(directory, index):
+    """
+    Writes a LandmarkIndex next to the dataset it was built from.
+    """
+    header = json.dumps({
+        "version": LANDMARKS_VERSION,
+        "layout": layout(),
+        "sources": source_stats(directory),
+        "landmarks": list(index.landmarks)
+    }).encode("utf-8")
+    path = index_path(directory)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        # keep the distance rows aligned to their item size
+        f.write(bytes(-f.tell() % array("H").itemsize))
+        for row in index.rows:
+            f.write(memoryview(row).cast("B"))
+    os.replace(temporary, path)
+    return path
+
+
+def load_index(directory):
+    """
+    Memory-maps the saved LandmarkIndex for a dataset, or returns None if
+    there is none or its dataset has changed since it was built.
+    """
+    try:
+        with open(index_path(directory), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    buffer = memoryview(mapped)
+    offset = len(MAGIC) + 8
+    if len(buffer) < offset or bytes(buffer[:len(MAGIC)]) != MAGIC:
+        return None
+    length, = struct.unpack_from("<Q", buffer, len(MAGIC))
+    try:
+        header = json.loads(str(buffer[offset:offset + length], "utf-8"))
+        if (header.get("version") != LANDMARKS_VERSION
+                or header.get("layout") != layout()
+                or header.get("sources") != source_stats(directory)):
+            return None
+    except (OSError, ValueError):
+        return None
+
+    start = offset + length
+    start += -start % array("H").itemsize
+    distances = buffer[start:].cast("H")
+    landmarks = header.get("landmarks")
+    if not landmarks or len(distances) % len(landmarks):
+        return None
+    count = len(distances) // len(landmarks)
+    rows = [distances[i * count:(i + 1) * count]
+            for i in range(len(landmarks))]
+    return LandmarkIndex(landmarks, rows)
+
+
+def load_or_build(directory, graph, k=DEFAULT_LANDMARKS):
+    """
+    Returns the saved LandmarkIndex for a dataset if it is up to date and
+    has k landmarks, otherwise builds and saves a new one.
+    """
+    index = load_index(directory)
+    expected = min(k, graph.person_count)
+    if (index is not None and len(index.landmarks) == expected
+            and len(index.rows[0]) == graph.person_count):
+        return index
+    index = build_index(graph, k)
+    try:
+        save_index(directory, index)
+    except OSError:
+        pass
+    return index
+
+
+def attach(directory, graph, k=DEFAULT_LANDMARKS):
+    """
+    Makes a dataset's LandmarkIndex available to search.landmark_search.
+    """
+    search.landmark_indexes[graph] = load_or_build(directory, graph, k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a landmark index.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("-k", type=int, default=DEFAULT_LANDMARKS,
+                        help="number of landmarks "
+                             f"(default: {DEFAULT_LANDMARKS})")
+    args = parser.parse_args()
+
+    graph = load_cached(args.directory)
+    index = build_index(graph, args.k)
+    path = save_index(args.directory, index)
+    print(f"Saved {len(index.landmarks)} landmarks "
+          f"({index.nbytes / 2**20:.1f} MiB) to {path}")
+
+
+if __name__ == "__main__":
+    main()
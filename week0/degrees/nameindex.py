@@ -0,0 +1,198 @@
+"""
+Name lookup for degrees: exact, prefix and typo-tolerant matching.
+
+Prefix search binary searches the graph's name_order, the person
+indices sorted by lowercase name. Fuzzy search uses a trigram index,
+stored in the graph as a sorted table of trigrams (name_grams) with a
+CSR posting list of the people whose names contain each one
+(name_gram_offsets and name_gram_people), plus the number of distinct
+trigrams in each person's name (name_gram_counts). All are built with
+the graph and kept in its snapshot, so lookups never scan every person
+or decode the names they score.
+"""
+
+import heapq
+import itertools
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+# Smallest similarity a fuzzy match may have by default
+MIN_SIMILARITY = 0.4
+
+
+def normalize(name):
+    """
+    Lowercases a name and collapses its whitespace.
+    """
+    return " ".join(name.lower().split())
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams of a normalized name, padded so that the
+    start and end of the name count for more.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_trigrams(names):
+    """
+    Builds the trigram index over a sequence of names. Returns the sorted
+    trigrams along with the offsets and people of their posting lists,
+    and the number of trigrams of each name.
+    """
+    postings = {}
+    counts = array("I")
+    for person, name in enumerate(names):
+        grams = trigrams(normalize(name))
+        counts.append(len(grams))
+        for gram in grams:
+            postings.setdefault(gram, []).append(person)
+    grams = sorted(postings)
+    offsets = array("I", [0])
+    people = array("I")
+    for gram in grams:
+        people.extend(postings[gram])
+        offsets.append(len(people))
+    return grams, offsets, people, counts
+
+
+class NameIndex():
+    """
+    Ranked name lookups over a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def candidates(self, people):
+        """
+        Returns (person_id, name, birth) for each person index.
+        """
+        graph = self.graph
+        return [(graph.person_ids[person], graph.names[person],
+                 graph.births[person]) for person in people]
+
+    def exact(self, name):
+        """
+        Returns the indices of people with exactly this name, ignoring case.
+        """
+        return self.graph.people_named(name)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns the indices of up to limit people whose names start with
+        prefix, ignoring case, in alphabetical order.
+        """
+        prefix = prefix.lower()
+        graph = self.graph
+        order = graph.name_order
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if graph.names[order[middle]].lower() < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        matches = []
+        while (low < len(order) and len(matches) < limit
+               and graph.names[order[low]].lower().startswith(prefix)):
+            matches.append(order[low])
+            low += 1
+        return matches
+
+    def fuzzy(self, name, limit=10, min_similarity=MIN_SIMILARITY):
+        """
+        Returns up to limit (person, similarity) pairs for the names most
+        similar to name, best first, where similarity is the Dice
+        coefficient of the two names' trigram sets.
+        """
+        query = trigrams(normalize(name))
+        graph = self.graph
+        offsets = graph.name_gram_offsets
+        people = graph.name_gram_people
+        postings = []
+        for gram in query:
+            i = self._find_gram(gram)
+            if i is not None:
+                postings.append(people[offsets[i]:offsets[i + 1]])
+        postings.sort(key=len)
+
+        # A name with m trigrams sharing t of the query's n trigrams has
+        # similarity 2t / (n + m) <= 2t / (n + t), so a match needs
+        # t >= s * n / (2 - s). Such a name must be in one of the
+        # len(postings) - t + 1 shortest posting lists, so only those are
+        # read in full, counting how many each person is in.
+        n = len(query)
+        least = max(1, math.ceil(min_similarity * n / (2 - min_similarity)))
+        cut = len(postings) - least + 1
+        if cut <= 0:
+            return []
+        shared = Counter(itertools.chain.from_iterable(postings[:cut]))
+        rest = postings[cut:]
+
+        # Candidates are scored most shared trigrams first, binary
+        # searching the longer lists (each sorted by person) for the rest,
+        # until none left could beat the limit-th best similarity found.
+        counts = graph.name_gram_counts
+        best = []
+        bar = min_similarity
+        for person, t in shared.most_common():
+            most = t + len(rest)
+            if 2 * most / (n + most) < bar:
+                break
+            m = counts[person]
+            if 2 * min(most, m) / (n + m) < bar:
+                continue
+            for posting in rest:
+                i = bisect_left(posting, person)
+                if i < len(posting) and posting[i] == person:
+                    t += 1
+            similarity = 2 * t / (n + m)
+            if similarity < bar:
+                continue
+            # ties go to the lower person index
+            item = (similarity, -person)
+            if len(best) < limit:
+                heapq.heappush(best, item)
+            elif item > best[0]:
+                heapq.heapreplace(best, item)
+            if len(best) == limit:
+                bar = max(bar, best[0][0])
+        best.sort(reverse=True)
+        return [(-person, similarity) for similarity, person in best]
+
+    def search(self, name, limit=10):
+        """
+        Returns up to limit person indices for a name: exact matches,
+        then prefix matches, then fuzzy matches.
+        """
+        matches = self.exact(name)[:limit]
+        for person in self.prefix(name, limit):
+            if len(matches) >= limit:
+                break
+            if person not in matches:
+                matches.append(person)
+        if len(matches) < limit:
+            for person, _ in self.fuzzy(name, limit):
+                if len(matches) >= limit:
+                    break
+                if person not in matches:
+                    matches.append(person)
+        return matches
+
+    def _find_gram(self, gram):
+        grams = self.graph.name_grams
+        low, high = 0, len(grams)
+        while low < high:
+            middle = (low + high) // 2
+            if grams[middle] < gram:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(grams) and grams[low] == gram:
+            return low
+        return None
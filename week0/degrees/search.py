@@ -0,0 +1,494 @@
+"""
+Shortest path searches over a compact Graph.
+
+Searches take and return person/movie indices. A path is a list of
+(movie, person) index pairs leading from the source to the target, in
+the same shape as degrees.shortest_path, and None if there is no path.
+People in different connected components are answered with None
+without searching.
+"""
+
+import weakref
+from array import array
+from collections import OrderedDict
+
+import stats
+
+# Marks a person not reached yet in a parent array
+UNSEEN = -1
+
+# Landmark distance stored for a person in another component
+UNREACHED = 0xFFFF
+
+
+def bfs(graph, source, target):
+    """
+    Breadth-first search from source, testing for the target as people
+    are discovered. Each movie's cast is scanned at most once.
+    """
+    if source == target:
+        return []
+    if not graph.connected(source, target):
+        return None
+
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+
+    # parent_person[p] is the person p was reached from, via parent_movie[p]
+    parent_person = array("i", [UNSEEN]) * graph.person_count
+    parent_movie = array("i", [UNSEEN]) * graph.person_count
+    movie_seen = bytearray(graph.movie_count)
+    parent_person[source] = source
+
+    frontier = [source]
+    expanded = scanned = peak = 0
+    while frontier:
+        peak = max(peak, len(frontier))
+        next_frontier = []
+        for person in frontier:
+            expanded += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if movie_seen[movie]:
+                    continue
+                movie_seen[movie] = 1
+                scanned += 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if parent_person[star] != UNSEEN:
+                        continue
+                    parent_person[star] = person
+                    parent_movie[star] = movie
+                    if star == target:
+                        stats.record_search(expanded, scanned, peak)
+                        return _trace(parent_person, parent_movie,
+                                      source, target)
+                    next_frontier.append(star)
+        frontier = next_frontier
+    stats.record_search(expanded, scanned, peak)
+    return None
+
+
+def bidirectional_bfs(graph, source, target):
+    """
+    Breadth-first search from both the source and the target, always
+    expanding the side with the smaller frontier.
+    """
+    if source == target:
+        return []
+    if not graph.connected(source, target):
+        return None
+
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+
+    # each side maps a reached person to (movie, person) one step closer
+    # to its own root, plus its distance from that root
+    forward = {source: None}
+    backward = {target: None}
+    forward_distance = {source: 0}
+    backward_distance = {target: 0}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    expanded = scanned = peak = 0
+    while forward_frontier and backward_frontier:
+        peak = max(peak, len(forward_frontier) + len(backward_frontier))
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, distance = \
+                forward_frontier, forward, forward_distance
+            others, other_distance = backward, backward_distance
+        else:
+            frontier, parents, distance = \
+                backward_frontier, backward, backward_distance
+            others, other_distance = forward, forward_distance
+
+        # expand the whole layer so the best meeting point in it is found
+        next_frontier = []
+        best, meeting = None, None
+        for person in frontier:
+            expanded += 1
+            depth = distance[person] + 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                scanned += 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if star in parents:
+                        continue
+                    parents[star] = (movie, person)
+                    distance[star] = depth
+                    next_frontier.append(star)
+                    if star in others:
+                        length = depth + other_distance[star]
+                        if best is None or length < best:
+                            best, meeting = length, star
+        if meeting is not None:
+            stats.record_search(expanded, scanned, peak)
+            return _join(forward, backward, meeting)
+
+        if parents is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+    stats.record_search(expanded, scanned, peak)
+    return None
+
+
+class BFSTree():
+    """
+    Breadth-first search tree from a single source, covering every
+    person reachable from it.
+
+    parent_person[p] and parent_movie[p] give the step p was reached by
+    and distance[p] its degrees of separation, all UNSEEN if p is not
+    reachable.
+    """
+
+    def __init__(self, source, parent_person, parent_movie, distance):
+        self.source = source
+        self.parent_person = parent_person
+        self.parent_movie = parent_movie
+        self.distance = distance
+
+    def distance_to(self, person):
+        """
+        Returns the degrees of separation to a person, or None if the
+        person is not reachable.
+        """
+        distance = self.distance[person]
+        return None if distance == UNSEEN else distance
+
+    def path_to(self, person):
+        """
+        Returns the path from the source to a person, or None if the
+        person is not reachable.
+        """
+        if self.distance[person] == UNSEEN:
+            return None
+        return _trace(self.parent_person, self.parent_movie,
+                      self.source, person)
+
+    def path_from(self, person):
+        """
+        Returns the path from a person to the source, or None if the
+        person is not reachable.
+        """
+        path = self.path_to(person)
+        if path is None:
+            return None
+        people = [self.source] + [star for _, star in path]
+        return [(path[i][0], people[i]) for i in reversed(range(len(path)))]
+
+    def reachable(self):
+        """
+        Returns the number of people reachable from the source,
+        including the source itself.
+        """
+        return sum(1 for distance in self.distance if distance != UNSEEN)
+
+
+def bfs_tree(graph, source):
+    """
+    Runs a full breadth-first search from source and returns its BFSTree.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+
+    parent_person = array("i", [UNSEEN]) * graph.person_count
+    parent_movie = array("i", [UNSEEN]) * graph.person_count
+    distance = array("i", [UNSEEN]) * graph.person_count
+    movie_seen = bytearray(graph.movie_count)
+    parent_person[source] = source
+    distance[source] = 0
+
+    frontier = [source]
+    depth = 0
+    expanded = scanned = peak = 0
+    while frontier:
+        peak = max(peak, len(frontier))
+        depth += 1
+        next_frontier = []
+        for person in frontier:
+            expanded += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if movie_seen[movie]:
+                    continue
+                movie_seen[movie] = 1
+                scanned += 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if distance[star] != UNSEEN:
+                        continue
+                    parent_person[star] = person
+                    parent_movie[star] = movie
+                    distance[star] = depth
+                    next_frontier.append(star)
+        frontier = next_frontier
+    stats.record_search(expanded, scanned, peak)
+    return BFSTree(source, parent_person, parent_movie, distance)
+
+
+class BFSTreeCache():
+    """
+    Least recently used cache of BFSTrees keyed by source, which turns
+    repeated queries from (or to) the same person into path lookups.
+    """
+
+    def __init__(self, graph, maxsize=16):
+        self.graph = graph
+        self.maxsize = maxsize
+        self.trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def tree(self, source):
+        """
+        Returns the BFSTree for source, building it if it is not cached.
+        """
+        tree = self.trees.get(source)
+        if tree is not None:
+            self.hits += 1
+            stats.count("tree_cache_hits")
+            self.trees.move_to_end(source)
+            return tree
+        self.misses += 1
+        stats.count("tree_cache_misses")
+        tree = bfs_tree(self.graph, source)
+        self.trees[source] = tree
+        if len(self.trees) > self.maxsize:
+            self.trees.popitem(last=False)
+        return tree
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest path from source to target, reusing a cached
+        tree from the target when there is one, as co-starring is symmetric.
+        """
+        if not self.graph.connected(source, target):
+            return None
+        if source not in self.trees and target in self.trees:
+            self.hits += 1
+            stats.count("tree_cache_hits")
+            self.trees.move_to_end(target)
+            return self.trees[target].path_from(source)
+        return self.tree(source).path_to(target)
+
+
+# One tree cache per graph, used by tree_bfs
+_tree_caches = weakref.WeakKeyDictionary()
+
+
+def tree_bfs(graph, source, target):
+    """
+    Shortest path through the graph's shared BFSTreeCache.
+    """
+    cache = _tree_caches.get(graph)
+    if cache is None:
+        cache = _tree_caches[graph] = BFSTreeCache(graph)
+    return cache.shortest_path(source, target)
+
+
+# Landmark indexes attached to graphs, used by landmark_search
+landmark_indexes = weakref.WeakKeyDictionary()
+
+
+def landmark_search(graph, source, target):
+    """
+    Bidirectional breadth-first search pruned by the LandmarkIndex
+    attached to the graph in landmark_indexes (in the manner of ALT).
+
+    The landmarks give a lower bound on every remaining distance and,
+    through the best landmark between source and target, an upper bound
+    with a path to match. When the bounds agree that path is returned
+    without searching; otherwise people who cannot lie on a path shorter
+    than the upper bound are never expanded.
+    """
+    index = landmark_indexes.get(graph)
+    if index is None:
+        raise Exception("no landmark index attached to graph")
+    if source == target:
+        return []
+    if not graph.connected(source, target):
+        return None
+
+    # landmarks in the same component, with their distances to source
+    # and target read once
+    rows, to_source, to_target = [], [], []
+    for row in index.rows:
+        if row[source] != UNREACHED:
+            rows.append(row)
+            to_source.append(row[source])
+            to_target.append(row[target])
+    if not rows:
+        return bidirectional_bfs(graph, source, target)
+
+    lower = max(abs(a - b) for a, b in zip(to_source, to_target))
+    upper, via = min((a + b, i)
+                     for i, (a, b) in enumerate(zip(to_source, to_target)))
+    if lower == upper:
+        stats.record_search(0, 0, 0)
+        return _through_landmark(graph, rows[via], source, target)
+
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+    forward_bounds = list(zip(rows, to_target))
+    backward_bounds = list(zip(rows, to_source))
+
+    # as in bidirectional_bfs
+    forward = {source: None}
+    backward = {target: None}
+    forward_distance = {source: 0}
+    backward_distance = {target: 0}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    # movies whose casts each side has already scanned
+    forward_movies = set()
+    backward_movies = set()
+
+    expanded = scanned = peak = 0
+    while forward_frontier and backward_frontier:
+        peak = max(peak, len(forward_frontier) + len(backward_frontier))
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, distance = \
+                forward_frontier, forward, forward_distance
+            others, other_distance = backward, backward_distance
+            bounds, movies = forward_bounds, forward_movies
+        else:
+            frontier, parents, distance = \
+                backward_frontier, backward, backward_distance
+            others, other_distance = forward, forward_distance
+            bounds, movies = backward_bounds, backward_movies
+
+        # paths must be shorter than limit to beat the best one known
+        next_frontier = []
+        limit, meeting, touched = upper, None, False
+        for person in frontier:
+            if limit == lower:
+                break
+            depth = distance[person] + 1
+            bound = 0
+            for row, end in bounds:
+                gap = row[person] - end
+                if gap > bound:
+                    bound = gap
+                elif -gap > bound:
+                    bound = -gap
+            if depth - 1 + bound >= limit:
+                continue
+            expanded += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if movie in movies:
+                    continue
+                movies.add(movie)
+                scanned += 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if star in parents:
+                        continue
+                    parents[star] = (movie, person)
+                    distance[star] = depth
+                    next_frontier.append(star)
+                    if star in others:
+                        touched = True
+                        length = depth + other_distance[star]
+                        if length < limit:
+                            limit, meeting = length, star
+        if meeting is not None:
+            stats.record_search(expanded, scanned, peak)
+            return _join(forward, backward, meeting)
+        if touched:
+            # the sides met, but not by a path shorter than upper
+            break
+
+        if parents is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    # no path shorter than the landmark one survived pruning
+    stats.record_search(expanded, scanned, peak)
+    return _through_landmark(graph, rows[via], source, target)
+
+
+def _descend(graph, row, person):
+    """
+    Returns the (movie, person) steps from person to the landmark whose
+    distances are in row, always moving to a co-star one step closer.
+    """
+    steps = []
+    distance = row[person]
+    while distance:
+        for movie in graph.movies_of(person):
+            closer = next((star for star in graph.stars_of(movie)
+                           if row[star] == distance - 1), None)
+            if closer is not None:
+                break
+        steps.append((movie, closer))
+        person = closer
+        distance -= 1
+    return steps
+
+
+def _through_landmark(graph, row, source, target):
+    """
+    Returns a shortest path from source to target through a landmark,
+    given its distances in row.
+    """
+    path = _descend(graph, row, source)
+    steps = _descend(graph, row, target)
+    people = [target] + [person for _, person in steps]
+    path.extend((steps[i][0], people[i]) for i in reversed(range(len(steps))))
+    return path
+
+
+def _trace(parent_person, parent_movie, source, target):
+    """
+    Follows parent arrays back from target to source.
+    """
+    path = []
+    person = target
+    while person != source:
+        path.append((parent_movie[person], person))
+        person = parent_person[person]
+    path.reverse()
+    return path
+
+
+def _join(forward, backward, meeting):
+    """
+    Stitches forward and backward parent maps together at a meeting person.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, previous = forward[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        movie, following = backward[person]
+        path.append((movie, following))
+        person = following
+    return path
+
+
+# Search strategies selectable from the command line
+SEARCHES = {
+    "bfs": bfs,
+    "bidirectional": bidirectional_bfs,
+    "tree": tree_bfs,
+    "alt": landmark_search,
+}
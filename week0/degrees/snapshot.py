@@ -0,0 +1,217 @@
+"""
+Binary snapshot cache for degrees datasets.
+
+Compiling a dataset writes its compact Graph into a single versioned file
+next to the CSVs. Loading memory-maps that file, so the arrays and string
+tables are used in place instead of being parsed again. A snapshot is
+ignored whenever its version, the platform's array layout, or the size or
+modification time of any source CSV no longer matches.
+
+Usage: python snapshot.py [directory]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+import stats
+from graph import INDEX, Graph, StringTable, load_graph
+
+SNAPSHOT_NAME = "degrees.snapshot"
+SNAPSHOT_VERSION = 4
+MAGIC = b"DEGREES\0"
+
+# Files the snapshot is compiled from
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Graph attributes stored as arrays and as string tables
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars",
+          "name_order", "name_gram_offsets", "name_gram_people",
+          "name_gram_counts", "component", "component_sizes"]
+TABLES = ["person_ids", "names", "births", "movie_ids", "titles", "years",
+          "name_grams"]
+
+# Sections start on multiples of this many bytes
+ALIGNMENT = 8
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def source_stats(directory):
+    """
+    Returns the size and modification time of each source CSV.
+    """
+    sources = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        sources[name] = [stat.st_size, stat.st_mtime_ns]
+    return sources
+
+
+def layout():
+    """
+    Describes how arrays are laid out in memory on this platform.
+    """
+    return {
+        "byteorder": sys.byteorder,
+        "itemsize": {code: array(code).itemsize for code in (INDEX, "Q")}
+    }
+
+
+def compile_snapshot(directory, graph=None):
+    """
+    Writes a snapshot of the dataset in directory, loading the graph from
+    the CSVs first if it is not given. Returns the snapshot's path.
+    """
+    sources = source_stats(directory)
+    if graph is None:
+        graph = load_graph(directory)
+
+    sections = []
+    for name in ARRAYS:
+        sections.append((name, INDEX, getattr(graph, name)))
+    for name in TABLES:
+        table = getattr(graph, name)
+        sections.append((f"{name}.data", "B", table.data))
+        sections.append((f"{name}.offsets", "Q", table.offsets))
+
+    # Lay out every section after the header
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "layout": layout(),
+        "sources": sources,
+        "sections": {}
+    }
+    position = 0
+    for name, typecode, values in sections:
+        size = memoryview(values).nbytes
+        header["sections"][name] = [position, size, typecode]
+        position += _padding(size) + size
+    encoded = json.dumps(header).encode("utf-8")
+    start = _aligned(len(MAGIC) + 8 + len(encoded))
+
+    path = snapshot_path(directory)
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=SNAPSHOT_NAME)
+    try:
+        # mkstemp creates the file readable by its owner only, but other
+        # users of a shared dataset need to read the snapshot too
+        os.chmod(temporary, 0o666 & ~_umask())
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(encoded)))
+            f.write(encoded)
+            f.write(bytes(start - f.tell()))
+            for name, typecode, values in sections:
+                data = memoryview(values).cast("B")
+                f.write(data)
+                f.write(bytes(_padding(len(data))))
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return path
+
+
+def load_snapshot(directory):
+    """
+    Memory-maps the snapshot in directory and returns its Graph,
+    or None if there is no snapshot or it is out of date.
+    """
+    path = snapshot_path(directory)
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    buffer = memoryview(mapped)
+    offset = len(MAGIC) + 8
+    if len(buffer) < offset or bytes(buffer[:len(MAGIC)]) != MAGIC:
+        return None
+    length, = struct.unpack_from("<Q", buffer, len(MAGIC))
+    try:
+        header = json.loads(str(buffer[offset:offset + length], "utf-8"))
+    except ValueError:
+        return None
+    if (header.get("version") != SNAPSHOT_VERSION
+            or header.get("layout") != layout()):
+        return None
+    try:
+        if header.get("sources") != source_stats(directory):
+            return None
+    except OSError:
+        return None
+
+    start = _aligned(offset + length)
+    sections = {}
+    for name, (position, size, typecode) in header.get("sections",
+                                                       {}).items():
+        position += start
+        if position + size > len(buffer):
+            return None
+        sections[name] = buffer[position:position + size].cast(typecode)
+
+    names = ARRAYS + [f"{name}.{part}" for name in TABLES
+                      for part in ("data", "offsets")]
+    if any(name not in sections for name in names):
+        return None
+    columns = {name: sections[name] for name in ARRAYS}
+    for name in TABLES:
+        columns[name] = StringTable(sections[f"{name}.data"],
+                                    sections[f"{name}.offsets"])
+    return Graph(**columns)
+
+
+def load_cached(directory):
+    """
+    Returns the Graph for a dataset, from its snapshot when that is up to
+    date, otherwise from the CSVs, compiling a fresh snapshot if possible.
+    """
+    with stats.phase("load_snapshot"):
+        graph = load_snapshot(directory)
+    if graph is not None:
+        stats.count("snapshot_hits")
+        return graph
+    stats.count("snapshot_misses")
+    graph = load_graph(directory)
+    try:
+        with stats.phase("compile_snapshot"):
+            compile_snapshot(directory, graph)
+    except OSError:
+        # a read-only dataset can still be used, just not cached
+        pass
+    return graph
+
+
+def _umask():
+    """
+    Returns the process's file mode creation mask.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def _aligned(size):
+    return size + _padding(size)
+
+
+def _padding(size):
+    return -size % ALIGNMENT
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python snapshot.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    print(f"Compiled {compile_snapshot(directory)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Optional instrumentation for degrees.
+
+Loaders and searches report counters and phase timings to the Stats
+object in `current`. While it is None, which is the default, nothing is
+recorded. Use `collecting()` to turn instrumentation on:
+
+    with stats.collecting() as recorded:
+        path = shortest_path(source, target)
+    print(recorded.as_json())
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+# Stats being collected, or None when instrumentation is off
+current = None
+
+
+class Stats():
+    """
+    Counters, peak values and per-phase timings.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.peaks = {}
+        self.phases = {}
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def peak(self, name, value):
+        if value > self.peaks.get(name, 0):
+            self.peaks[name] = value
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Adds the time spent inside the block to the named phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def as_dict(self):
+        return {
+            "counters": dict(self.counters),
+            "peaks": dict(self.peaks),
+            "phases": dict(self.phases)
+        }
+
+    def as_json(self):
+        return json.dumps(self.as_dict(), sort_keys=True)
+
+
+@contextmanager
+def collecting():
+    """
+    Records stats into a fresh Stats object for the duration of the block.
+    """
+    global current
+    previous = current
+    current = Stats()
+    try:
+        yield current
+    finally:
+        current = previous
+
+
+@contextmanager
+def phase(name):
+    """
+    Times a phase into the current Stats, if any.
+    """
+    if current is None:
+        yield
+    else:
+        with current.phase(name):
+            yield
+
+
+def count(name, amount=1):
+    """
+    Adds to a counter of the current Stats, if any.
+    """
+    if current is not None:
+        current.count(name, amount)
+
+
+def record_search(expanded, scanned, peak):
+    """
+    Records the work done by one search into the current Stats, if any.
+    """
+    if current is not None:
+        current.count("searches")
+        current.count("nodes_expanded", expanded)
+        current.count("movies_scanned", scanned)
+        current.peak("frontier_peak", peak)
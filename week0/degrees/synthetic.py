@@ -0,0 +1,100 @@
+"""
+Synthetic degrees datasets.
+
+Writes people.csv, movies.csv and stars.csv in the same format as the
+IMDB datasets. Casts are drawn with preferential attachment, so a few
+people appear in many movies as in the real data, and names are drawn
+from small pools, so some are shared. The same seed always produces the
+same files.
+
+Usage: python synthetic.py directory [--scale SCALE] [--seed S]
+"""
+
+import argparse
+import csv
+import os
+import random
+
+# Dataset sizes as (people, movies, mean cast size)
+SCALES = {
+    "tiny": (1000, 400, 4),
+    "small": (20000, 8000, 5),
+    "medium": (200000, 80000, 5),
+    "large": (1000000, 350000, 5),
+}
+
+FIRST_NAMES = [
+    "Alex", "Ana", "Ben", "Carla", "Chris", "Dana", "Eli", "Emma", "Frank",
+    "Grace", "Hugo", "Ivy", "Jack", "Julia", "Kevin", "Lena", "Mark", "Nina",
+    "Omar", "Paula", "Quinn", "Rosa", "Sam", "Tom", "Uma", "Victor", "Wendy",
+]
+LAST_NAMES = [
+    "Bacon", "Brown", "Cruz", "Davis", "Evans", "Garcia", "Hanks", "Ito",
+    "Jones", "Kim", "Lopez", "Moore", "Novak", "Ortiz", "Patel", "Quinn",
+    "Rossi", "Smith", "Tanaka", "Ueda", "Vega", "Wright", "Young", "Zhang",
+]
+
+
+def generate(directory, people, movies, cast, seed=0):
+    """
+    Writes a synthetic dataset of the given size into directory.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    person_ids = [str(100 + 7 * i) for i in range(people)]
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person_id in person_ids:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            # give most people a distinguishing middle initial
+            if rng.random() < 0.9:
+                name = name.replace(" ", f" {rng.choice(LAST_NAMES)[0]}. ", 1)
+            writer.writerow([person_id, name, rng.randint(1920, 2005)])
+
+    movie_ids = [str(10000 + 13 * i) for i in range(movies)]
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i, movie_id in enumerate(movie_ids):
+            writer.writerow([movie_id, f"Movie {i}", rng.randint(1930, 2020)])
+
+    # every past casting is a ticket for that person to be cast again
+    castings = []
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie_id in movie_ids:
+            for _ in range(max(1, round(rng.expovariate(1 / cast)))):
+                if castings and rng.random() < 0.5:
+                    person_id = rng.choice(castings)
+                else:
+                    person_id = rng.choice(person_ids)
+                castings.append(person_id)
+                writer.writerow([person_id, movie_id])
+
+
+def generate_scale(directory, scale, seed=0):
+    """
+    Writes a synthetic dataset of one of the SCALES into directory.
+    """
+    people, movies, cast = SCALES[scale]
+    generate(directory, people, movies, cast, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic degrees dataset.")
+    parser.add_argument("directory")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_scale(args.directory, args.scale, args.seed)
+
+
+if __name__ == "__main__":
+    main()
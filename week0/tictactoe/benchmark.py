@@ -0,0 +1,95 @@
+"""
+Compares the minimax search methods.
+
+For each position, every method must return the same action; the
+number of positions visited and the time taken are reported. The
+transposition table starts empty and is shared across positions, as it
+would be over a game.
+
+Usage: python benchmark.py [--random N] [--seed S] [--skip-empty]
+           [--methods METHOD ...]
+"""
+
+import argparse
+import random
+import time
+
+import tictactoe as ttt
+
+
+def random_position(rng, moves):
+    """
+    Plays up to moves random moves from the initial board, stopping
+    early if the game ends.
+    """
+    board = ttt.initial_state()
+    for _ in range(moves):
+        if ttt.terminal(board):
+            break
+        board = ttt.result(board, rng.choice(sorted(ttt.actions(board))))
+    return board
+
+
+def describe(board):
+    return "/".join("".join(cell or "." for cell in row) for row in board)
+
+
+def measure(board, method):
+    """
+    Returns (action, nodes, seconds) for one minimax search.
+    """
+    start = time.perf_counter()
+    action = ttt.minimax(board, method=method)
+    return action, ttt.nodes, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark minimax.")
+    parser.add_argument("--random", type=int, default=10,
+                        help="random positions to add (default: 10)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-empty", action="store_true",
+                        help="leave out the slow empty-board search")
+    parser.add_argument("--methods", nargs="+", choices=list(ttt.METHODS),
+                        default=list(ttt.METHODS),
+                        help="methods to compare (default: all)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    positions = [] if args.skip_empty else [ttt.initial_state()]
+    for action in sorted(ttt.actions(ttt.initial_state())):
+        positions.append(ttt.result(ttt.initial_state(), action))
+    for _ in range(args.random):
+        board = random_position(rng, rng.randint(2, 6))
+        if not ttt.terminal(board):
+            positions.append(board)
+
+    ttt.clear_transpositions()
+    print(f"{'position':>12}" + "".join(
+        f"{method + ' nodes':>16}{method + ' s':>12}"
+        for method in args.methods))
+    totals = {method: [0, 0.0] for method in args.methods}
+    for board in positions:
+        row = f"{describe(board):>12}"
+        actions = set()
+        for method in args.methods:
+            action, nodes, elapsed = measure(board, method)
+            actions.add(action)
+            totals[method][0] += nodes
+            totals[method][1] += elapsed
+            row += f"{nodes:>16}{elapsed:>12.3f}"
+        if len(actions) != 1:
+            raise Exception(f"methods disagree on {describe(board)}")
+        print(row)
+
+    print(f"{'total':>12}" + "".join(
+        f"{nodes:>16}{elapsed:>12.3f}" for nodes, elapsed in totals.values()))
+    print(f"transposition table: {ttt.table_stats['hits']} hits, "
+          f"{ttt.table_stats['misses']} misses, "
+          f"{len(ttt.transpositions)} positions")
+    print(f"book: {ttt.book.stats['hits']} hits, "
+          f"{ttt.book.stats['misses']} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Tic Tac Toe engine on bitboards.
+
+A position is two 9-bit integers, one per player, where bit 3 * i + j
+is set when that player holds cell (i, j). Moves are a single OR, wins
+are checked against 8 precomputed line masks, and the side to move
+comes from popcounts.
+
+The functions at the bottom adapt the engine to the list-of-lists
+boards used by tictactoe.py, so runner.py can play with either module.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# The 3 rows, 3 columns and 2 diagonals
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+]
+
+# Scores of positions solved so far, keyed by (x, o)
+scores = {}
+
+# Positions solved by the most recent minimax call
+nodes = 0
+
+
+def x_to_move(x, o):
+    """
+    Returns True if X has the next turn.
+    """
+    return x.bit_count() <= o.bit_count()
+
+
+def moves(x, o):
+    """
+    Returns the empty cells, lowest first.
+    """
+    empty = FULL & ~(x | o)
+    cells = []
+    while empty:
+        low = empty & -empty
+        cells.append(low.bit_length() - 1)
+        empty ^= low
+    return cells
+
+
+def play(x, o, cell):
+    """
+    Returns the position after the side to move takes cell.
+    """
+    if (x | o) >> cell & 1:
+        raise ValueError
+    if x_to_move(x, o):
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def has_line(bits):
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def score(x, o):
+    """
+    Returns 1 if X has won, -1 if O has won, 0 otherwise.
+    """
+    if has_line(x):
+        return 1
+    if has_line(o):
+        return -1
+    return 0
+
+
+def is_terminal(x, o):
+    return (x | o) == FULL or has_line(x) or has_line(o)
+
+
+def solve(x, o):
+    """
+    Returns the exact minimax score of a position, where a win n moves
+    away counts 1 / 2 ** n, as in tictactoe.minimax.
+    """
+    global nodes
+    key = (x, o)
+    value = scores.get(key)
+    if value is not None:
+        return value
+    nodes += 1
+    if is_terminal(x, o):
+        value = score(x, o)
+    else:
+        values = [solve(*play(x, o, cell)) for cell in moves(x, o)]
+        value = (max(values) if x_to_move(x, o) else min(values)) / 2
+    scores[key] = value
+    return value
+
+
+def from_board(board):
+    """
+    Converts a list-of-lists board into an (x, o) position.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Converts an (x, o) position into a list-of-lists board.
+    """
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
+
+
+def initial_state():
+    return to_board(0, 0)
+
+
+def player(board):
+    return X if x_to_move(*from_board(board)) else O
+
+
+def actions(board):
+    return {divmod(cell, 3) for cell in moves(*from_board(board))}
+
+
+def result(board, action):
+    return to_board(*play(*from_board(board), 3 * action[0] + action[1]))
+
+
+def winner(board):
+    return {1: X, -1: O, 0: None}[score(*from_board(board))]
+
+
+def terminal(board):
+    return is_terminal(*from_board(board))
+
+
+def utility(board):
+    return score(*from_board(board))
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    Ties go to the first best action in actions() order, matching
+    tictactoe.minimax.
+    """
+    global nodes
+    nodes = 0
+    x, o = from_board(board)
+    if is_terminal(x, o):
+        return None
+    maximizing = x_to_move(x, o)
+    best_action = None
+    best = None
+    for action in actions(board):
+        value = solve(*play(x, o, 3 * action[0] + action[1]))
+        if (best is None or (maximizing and value > best)
+                or (not maximizing and value < best)):
+            best_action, best = action, value
+    return best_action
@@ -0,0 +1,245 @@
+"""
+Perfect-play book for Tic Tac Toe.
+
+Every one of the 5,478 positions reachable from the empty board is
+solved once and stored as two byte tables indexed by the board's
+base-3 code: the best move (the same one minimax picks) and the
+position's minimax score. The tables are saved to BOOK_PATH and loaded
+lazily the first time a position is looked up, and regenerated if the
+saved copy is missing or was written by a different BOOK_VERSION.
+
+Usage: python book.py [--verify]
+"""
+
+import argparse
+import os
+import struct
+import sys
+import tempfile
+
+import bitboard
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "tictactoe.book")
+MAGIC = b"TTTBOOK\0"
+
+# Bump whenever scoring, tie-breaking or the file layout changes, so
+# books saved by older versions are rebuilt rather than trusted
+BOOK_VERSION = 2
+HEADER = struct.Struct("<I")
+
+# Number of distinct 3x3 boards, and so of book entries
+ENTRIES = 3 ** 9
+
+# Move byte for boards that are not in the book, and for finished games
+UNKNOWN = 0xFF
+FINISHED = 0xFE
+
+# Book loaded by lookup, and how often it could answer
+book = None
+stats = {"hits": 0, "misses": 0}
+
+
+class Book():
+    """
+    Best moves and scores for positions, indexed by board_code.
+    """
+
+    def __init__(self, moves, scores):
+        self.moves = moves
+        self.scores = scores
+
+    def __len__(self):
+        return sum(1 for move in self.moves if move != UNKNOWN)
+
+    def entry(self, board):
+        """
+        Returns (action, score) for a board, with action None if the
+        game is over, or None if the board is not in the book.
+        """
+        code = board_code(board)
+        move = self.moves[code]
+        if move == UNKNOWN:
+            return None
+        score = decode_score(self.scores[code])
+        if move == FINISHED:
+            return None, score
+        return divmod(move, 3), score
+
+
+def board_code(board):
+    """
+    Returns the base-3 code of a board, with X as 1 and O as 2.
+    """
+    code = 0
+    for row in board:
+        for cell in row:
+            code = code * 3 + (0 if cell is None else 1 if cell == "X" else 2)
+    return code
+
+
+def encode_score(score):
+    """
+    Packs a score of 0 or +-1 / 2 ** n into a byte.
+    """
+    if score == 0:
+        return 0
+    depth = 0
+    while abs(score) * 2 ** depth < 1:
+        depth += 1
+    return (depth + 1) | (0x80 if score < 0 else 0)
+
+
+def decode_score(byte):
+    if byte == 0:
+        return 0
+    score = 1 / 2 ** ((byte & 0x7F) - 1)
+    return -score if byte & 0x80 else score
+
+
+def generate():
+    """
+    Solves every reachable position and returns the Book.
+    """
+    moves = bytearray([UNKNOWN]) * ENTRIES
+    scores = bytearray(ENTRIES)
+    frontier = [bitboard.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        code = board_code(board)
+        if moves[code] != UNKNOWN:
+            continue
+        x, o = bitboard.from_board(board)
+        scores[code] = encode_score(bitboard.solve(x, o))
+        if bitboard.is_terminal(x, o):
+            moves[code] = FINISHED
+            continue
+        i, j = bitboard.minimax(board)
+        moves[code] = 3 * i + j
+        for action in bitboard.actions(board):
+            frontier.append(bitboard.result(board, action))
+    return Book(moves, scores)
+
+
+def save(book, path=BOOK_PATH):
+    """
+    Writes book to path through a temporary file of its own, so processes
+    saving at the same time never write into each other's file.
+    """
+    directory, name = os.path.split(path)
+    fd, temporary = tempfile.mkstemp(dir=directory or ".", prefix=name)
+    try:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temporary, 0o666 & ~umask)
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(HEADER.pack(BOOK_VERSION))
+            f.write(book.moves)
+            f.write(book.scores)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def load(path=BOOK_PATH):
+    """
+    Returns the Book saved at path, or None if it is missing, invalid or
+    from another BOOK_VERSION.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    start = len(MAGIC) + HEADER.size
+    if len(data) != start + 2 * ENTRIES or not data.startswith(MAGIC):
+        return None
+    version, = HEADER.unpack_from(data, len(MAGIC))
+    if version != BOOK_VERSION:
+        return None
+    return Book(data[start:start + ENTRIES], data[start + ENTRIES:])
+
+
+def get_book():
+    """
+    Returns the book, loading it on first use and generating and saving
+    it if there is no valid saved copy.
+    """
+    global book
+    if book is None:
+        book = load()
+        if book is None:
+            book = generate()
+            try:
+                save(book)
+            except OSError:
+                pass
+    return book
+
+
+def lookup(board):
+    """
+    Returns the book's best action for a board, or None if the board is
+    not in the book or the game is over.
+    """
+    entry = get_book().entry(board)
+    if entry is None or entry[0] is None:
+        stats["misses"] += 1
+        return None
+    stats["hits"] += 1
+    return entry[0]
+
+
+def verify(book, search):
+    """
+    Checks every book move against search(board), returning the list of
+    (board, book action, searched action) disagreements.
+    """
+    mismatches = []
+    for code, move in enumerate(book.moves):
+        if move in (UNKNOWN, FINISHED):
+            continue
+        digits = []
+        for _ in range(9):
+            code, digit = divmod(code, 3)
+            digits.append([None, "X", "O"][digit])
+        digits.reverse()
+        board = [digits[0:3], digits[3:6], digits[6:9]]
+        searched = search(board)
+        if searched != divmod(move, 3):
+            mismatches.append((board, divmod(move, 3), searched))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening book.")
+    parser.add_argument("--verify", action="store_true",
+                        help="cross-check every entry of the saved book "
+                             "against live search instead of building it")
+    args = parser.parse_args()
+
+    if not args.verify:
+        generated = generate()
+        save(generated)
+        print(f"Saved {len(generated)} positions to {BOOK_PATH}")
+        return
+
+    saved = load()
+    if saved is None:
+        sys.exit(f"No valid version {BOOK_VERSION} book at {BOOK_PATH}; "
+                 "run python book.py to build one")
+    import tictactoe
+    mismatches = verify(saved, lambda board: tictactoe.minimax(
+        board, method="alphabeta"))
+    for board, expected, searched in mismatches:
+        print(f"{board}: book {expected}, search {searched}")
+    if mismatches:
+        sys.exit(f"{len(mismatches)} positions disagree")
+    print(f"All {len(saved)} positions in {BOOK_PATH} agree with "
+          "alpha-beta search.")
+
+
+if __name__ == "__main__":
+    main()
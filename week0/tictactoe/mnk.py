@@ -0,0 +1,367 @@
+"""
+m,n,k-game engine.
+
+Players take turns on an m by n board and the first to get k in a row,
+horizontally, vertically or diagonally, wins. Tic Tac Toe is the 3,3,3
+game and gomoku is the 15,15,5 one.
+
+Boards are lists of rows, as in tictactoe.py, and Game offers the same
+initial_state, player, actions, result, winner, terminal, utility and
+minimax functions. Since larger games cannot be searched to the end,
+minimax deepens an alpha-beta search one move at a time until its time
+budget runs out, scoring unfinished positions with a heuristic.
+
+    game = Game(4, 4, 3)
+    action = game.minimax(board, budget=1.0)
+"""
+
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a win, less the number of moves it takes, so faster wins
+# score higher; heuristics must stay well below it
+WIN = 1000000
+
+# Directions a line can run in: along a row, down a column, and the
+# two diagonals
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+# Game and best root score so far of a worker process, set by
+# start_worker
+worker_game = None
+worker_bound = None
+
+
+class OutOfTime(Exception):
+    pass
+
+
+def line_heuristic(game, cells):
+    """
+    Scores a position for X by counting the lines of k cells still open
+    to only one player, weighting each by how many of its cells that
+    player already holds.
+    """
+    touched = set()
+    for cell, piece in enumerate(cells):
+        if piece != EMPTY:
+            touched.update(game.lines_through[cell])
+    score = 0
+    for index in touched:
+        xs = os = 0
+        line = game.lines[index]
+        for cell in line:
+            if cells[cell] == X:
+                xs += 1
+            elif cells[cell] == O:
+                os += 1
+        if os == 0 and xs:
+            score += 4 ** xs
+        elif xs == 0 and os:
+            score -= 4 ** os
+    return score
+
+
+class Game():
+    """
+    An m,n,k-game: m rows, n columns and k in a row to win.
+    """
+
+    def __init__(self, m=3, n=3, k=3, heuristic=line_heuristic, reach=2):
+        """
+        heuristic(game, cells) scores unfinished positions for X, with
+        cells the board read row by row. Searches only consider empty
+        cells within reach rows and columns of a played one, or every
+        empty cell if reach is None.
+        """
+        if k > max(m, n):
+            raise ValueError("k is longer than the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.heuristic = heuristic
+        self.reach = reach
+
+        # every line of k cells on the board, as flat cell indices
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in DIRECTIONS:
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(tuple(
+                            (i + di * step) * n + j + dj * step
+                            for step in range(k)))
+        self.lines_through = [[] for _ in range(m * n)]
+        for index, line in enumerate(self.lines):
+            for cell in line:
+                self.lines_through[cell].append(index)
+
+        # cells closest to the center first
+        center_i, center_j = (m - 1) / 2, (n - 1) / 2
+        self.order = sorted(
+            range(m * n),
+            key=lambda cell: (abs(cell // n - center_i)
+                              + abs(cell % n - center_j), cell))
+
+        # positions visited by the most recent minimax call, and the
+        # deepest search it completed
+        self.nodes = 0
+        self.depth = 0
+
+    def initial_state(self):
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        count_x = count_o = 0
+        for row in board:
+            for cell in row:
+                if cell == X:
+                    count_x += 1
+                elif cell == O:
+                    count_o += 1
+        return X if count_x <= count_o else O
+
+    def actions(self, board):
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        i, j = action
+        if board[i][j] != EMPTY:
+            raise ValueError
+        copied_board = [list(row) for row in board]
+        copied_board[i][j] = self.player(board)
+        return copied_board
+
+    def wins_at(self, cells, cell):
+        """
+        Returns True if the piece on cell completes k in a row. Only
+        the four lines through cell are checked, so after each move
+        this finds any new win without scanning the board.
+        """
+        piece = cells[cell]
+        i, j = divmod(cell, self.n)
+        for di, dj in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                row, column = i + sign * di, j + sign * dj
+                while (0 <= row < self.m and 0 <= column < self.n
+                       and cells[row * self.n + column] == piece):
+                    count += 1
+                    row, column = row + sign * di, column + sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+    def winner(self, board):
+        cells = [cell for row in board for cell in row]
+        for cell, piece in enumerate(cells):
+            if piece != EMPTY and self.wins_at(cells, cell):
+                return piece
+        return None
+
+    def terminal(self, board):
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+    def candidates(self, cells):
+        """
+        Returns the empty cells worth searching, center first.
+        """
+        if self.reach is None or all(cell == EMPTY for cell in cells):
+            return [cell for cell in self.order if cells[cell] == EMPTY]
+        near = set()
+        for cell, piece in enumerate(cells):
+            if piece == EMPTY:
+                continue
+            i, j = divmod(cell, self.n)
+            for row in range(max(0, i - self.reach),
+                             min(self.m, i + self.reach + 1)):
+                for column in range(max(0, j - self.reach),
+                                    min(self.n, j + self.reach + 1)):
+                    near.add(row * self.n + column)
+        return [cell for cell in self.order
+                if cell in near and cells[cell] == EMPTY]
+
+    def minimax(self, board, budget=None, max_depth=None, workers=None):
+        """
+        Returns the best action found for the current player, searching
+        one move deeper at a time until budget seconds have passed or
+        max_depth is reached. With neither, searches to the end of the
+        game, which is only feasible on small boards. With workers, root
+        moves are split across that many processes; the action is the
+        same as without.
+        """
+        self.nodes = 0
+        self.depth = 0
+        if self.terminal(board):
+            return None
+        cells = [cell for row in board for cell in row]
+        if workers is None:
+            return divmod(self.deepen(cells, budget, max_depth,
+                                      self.search_root), self.n)
+        bound = multiprocessing.Value("d", -math.inf)
+        with ProcessPoolExecutor(workers, initializer=start_worker,
+                                 initargs=(self, bound)) as pool:
+            def split(cells, turn, moves, depth, deadline):
+                return self.split_root(pool, bound, cells, turn, moves,
+                                       depth, deadline)
+            return divmod(self.deepen(cells, budget, max_depth, split),
+                          self.n)
+
+    def deepen(self, cells, budget, max_depth, search):
+        """
+        Returns the best cell found by calling search for one depth
+        after another, as long as time and max_depth allow.
+        """
+        turn = O if cells.count(X) > cells.count(O) else X
+        moves = self.candidates(cells)
+        empties = cells.count(EMPTY)
+        limit = empties if max_depth is None else min(max_depth, empties)
+        deadline = None if budget is None else time.perf_counter() + budget
+
+        best_cell = moves[0]
+        for depth in range(1, limit + 1):
+            try:
+                cell, score = search(cells, turn, moves, depth, deadline)
+            except OutOfTime:
+                break
+            best_cell = cell
+            self.depth = depth
+            # search the best move first next time, to prune more
+            moves.remove(cell)
+            moves.insert(0, cell)
+            if abs(score) >= WIN - empties:
+                break
+        return best_cell
+
+    def search_root(self, cells, turn, moves, depth, deadline):
+        """
+        Returns (cell, score) for the best root move, searching depth
+        moves ahead. Scores are for the player to move, and ties go to
+        the move that comes first.
+        """
+        opponent = O if turn == X else X
+        best_cell = None
+        best = -math.inf
+        for cell in moves:
+            cells[cell] = turn
+            try:
+                score = -self.negamax(cells, cell, opponent, depth - 1, 1,
+                                      -math.inf, -best, deadline)
+            finally:
+                cells[cell] = EMPTY
+            if score > best:
+                best_cell, best = cell, score
+        return best_cell, best
+
+    def split_root(self, pool, bound, cells, turn, moves, depth, deadline):
+        """
+        Same as search_root, with each root move searched by a worker of
+        pool. Workers start from the best score found so far, in bound,
+        and raise it when they beat it.
+        """
+        bound.value = -math.inf
+        futures = {}
+        for cell in moves:
+            cells[cell] = turn
+            futures[pool.submit(search_move, list(cells), cell, depth,
+                                deadline)] = cell
+            cells[cell] = EMPTY
+        results = {}
+        try:
+            for future in as_completed(futures):
+                score, alpha, nodes = future.result()
+                self.nodes += nodes
+                results[futures[future]] = (score, alpha)
+        except OutOfTime:
+            for future in futures:
+                future.cancel()
+            raise
+
+        # scores above the bound a move was searched with are exact, and
+        # the rest only show the move is no better than that bound
+        best = max(score for score, alpha in results.values()
+                   if score > alpha)
+        opponent = O if turn == X else X
+        for cell in moves:
+            score, alpha = results[cell]
+            if score == best and score <= alpha:
+                # it might tie with best, in which case it wins as it
+                # comes first, so find its exact score
+                cells[cell] = turn
+                try:
+                    score = -self.negamax(cells, cell, opponent, depth - 1,
+                                          1, -math.inf, math.inf, deadline)
+                finally:
+                    cells[cell] = EMPTY
+            if score == best:
+                return cell, best
+
+    def negamax(self, cells, last, turn, depth, ply, alpha, beta, deadline):
+        """
+        Returns the score of the position for turn, the player to move,
+        after the other player took cell last.
+        """
+        self.nodes += 1
+        if deadline is not None and time.perf_counter() > deadline:
+            raise OutOfTime
+        if self.wins_at(cells, last):
+            return ply - WIN
+        moves = self.candidates(cells)
+        if not moves:
+            return 0
+        if depth == 0:
+            score = self.heuristic(self, cells)
+            return score if turn == X else -score
+
+        opponent = O if turn == X else X
+        best = -math.inf
+        for cell in moves:
+            cells[cell] = turn
+            try:
+                score = -self.negamax(cells, cell, opponent, depth - 1,
+                                      ply + 1, -beta, -alpha, deadline)
+            finally:
+                cells[cell] = EMPTY
+            if score > best:
+                best = score
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+        return best
+
+
+def start_worker(game, bound):
+    global worker_game, worker_bound
+    worker_game = game
+    worker_bound = bound
+
+
+def search_move(cells, cell, depth, deadline):
+    """
+    Returns (score, alpha, nodes) for the root move to cell, already
+    played on cells, searched only as far as needed to tell whether it
+    beats alpha, the best score in worker_bound when the search began.
+    """
+    worker_game.nodes = 0
+    alpha = worker_bound.value
+    turn = X if cells[cell] == O else O
+    score = -worker_game.negamax(cells, cell, turn, depth - 1, 1,
+                                 -math.inf, -alpha, deadline)
+    if score > alpha:
+        with worker_bound.get_lock():
+            if score > worker_bound.value:
+                worker_bound.value = score
+    return score, alpha, worker_game.nodes
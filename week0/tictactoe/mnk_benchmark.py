@@ -0,0 +1,78 @@
+"""
+Measures the speedup of splitting m,n,k root moves across processes.
+
+Each position is searched to a fixed depth serially and then with each
+worker count; every search must return the same action.
+
+Usage: python mnk_benchmark.py [--game M N K] [--depth D] [--positions P]
+           [--seed S] [--workers W ...]
+"""
+
+import argparse
+import random
+import time
+
+import mnk
+
+
+def random_position(game, rng, moves):
+    """
+    Plays up to moves random moves near the center of an empty board.
+    """
+    board = game.initial_state()
+    for _ in range(moves):
+        if game.terminal(board):
+            break
+        cells = [cell for row in board for cell in row]
+        cell = rng.choice(game.candidates(cells)[:9])
+        board = game.result(board, divmod(cell, game.n))
+    return board
+
+
+def measure(game, board, depth, workers):
+    """
+    Returns (action, nodes, seconds) for one fixed-depth search.
+    """
+    start = time.perf_counter()
+    action = game.minimax(board, max_depth=depth, workers=workers)
+    return action, game.nodes, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark parallel m,n,k search.")
+    parser.add_argument("--game", type=int, nargs=3, default=[7, 7, 4],
+                        metavar=("M", "N", "K"))
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--positions", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    game = mnk.Game(*args.game)
+    rng = random.Random(args.seed)
+    positions = [random_position(game, rng, rng.randint(1, 4))
+                 for _ in range(args.positions)]
+
+    print(f"{'workers':>8}{'nodes':>12}{'seconds':>10}{'speedup':>10}")
+    expected = []
+    serial = None
+    for workers in [None] + args.workers:
+        total_nodes = 0
+        total_time = 0.0
+        for i, board in enumerate(positions):
+            action, nodes, elapsed = measure(game, board, args.depth, workers)
+            if workers is None:
+                expected.append(action)
+            elif action != expected[i]:
+                raise Exception(f"{workers} workers disagree on position {i}")
+            total_nodes += nodes
+            total_time += elapsed
+        if serial is None:
+            serial = total_time
+        print(f"{workers or 'serial':>8}{total_nodes:>12}{total_time:>10.2f}"
+              f"{serial / total_time:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,55 @@
+import argparse
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import Future
+
+import bitboard
+import mnk
+import tictactoe
+
+parser = argparse.ArgumentParser(description="Play Tic-Tac-Toe.")
+parser.add_argument("--bitboard", action="store_true",
+                    help="play against the bitboard engine")
+parser.add_argument("--budget", type=float,
+                    help="seconds the computer may think about each move, "
+                         "after which it plays the best move found so far")
+args = parser.parse_args()
+ttt = bitboard if args.bitboard else tictactoe
+
+# With a budget, moves come from the m,n,k engine, which searches one
+# move deeper at a time until its time runs out
+budgeted = mnk.Game(3, 3, 3)
+
+# Frames drawn per second, and the shortest time the computer is shown
+# thinking before it moves
+FPS = 30
+THINKING = 0.5
+if args.budget is not None:
+    THINKING = min(THINKING, args.budget)
+
+
+def think(board):
+    """
+    Starts searching for the computer's move on a background thread and
+    returns a Future for it, so the window keeps drawing meanwhile. The
+    thread is a daemon, so an abandoned search does not delay quitting.
+    """
+    future = Future()
+
+    def run():
+        try:
+            if args.budget is None:
+                future.set_result(ttt.minimax(board))
+            else:
+                future.set_result(budgeted.minimax(board, budget=args.budget))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
 
-import tictactoe as ttt
 
 pygame.init()
 size = width, height = 600, 400
@@ -17,9 +64,14 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+clock = pygame.time.Clock()
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# Search for the computer's move, and when it started
+ai_move = None
+ai_started = None
 
 while True:
 
@@ -102,7 +154,9 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            # the dots keep moving while the search runs
+            dots = int(time.perf_counter() * 3) % 3 + 1
+            title = "Computer thinking" + "." * dots
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
@@ -110,13 +164,14 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+            if ai_move is None:
+                ai_move = think(board)
+                ai_started = time.perf_counter()
             else:
-                ai_turn = True
+                thinking = time.perf_counter() - ai_started
+                if ai_move.done() and thinking >= THINKING:
+                    board = ttt.result(board, ai_move.result())
+                    ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +196,7 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    ai_move = None
 
     pygame.display.flip()
+    clock.tick(FPS)
@@ -0,0 +1,138 @@
+"""
+Headless self-play for Tic Tac Toe.
+
+Plays full games of minimax against itself, or against a player making
+random moves, spread over worker processes, and prints throughput,
+search and cache statistics and the results as JSON. Against the random
+player, minimax plays X in even-numbered games and O in odd ones. The
+same seed always plays the same games.
+
+Usage: python selfplay.py [--games N] [--opponent {self,random}]
+           [--method METHOD] [--workers W] [--seed S]
+"""
+
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import tictactoe as ttt
+
+
+def play_game(method, opponent, index, seed):
+    """
+    Plays one game and returns (winner, nodes, searches).
+    """
+    rng = random.Random(seed * 1000003 + index)
+    # side played by the random player, if any
+    randomized = None
+    if opponent == "random":
+        randomized = ttt.O if index % 2 == 0 else ttt.X
+    board = ttt.initial_state()
+    nodes = searches = 0
+    while not ttt.terminal(board):
+        if ttt.player(board) == randomized:
+            action = rng.choice(sorted(ttt.actions(board)))
+        else:
+            action = ttt.minimax(board, method=method)
+            nodes += ttt.nodes
+            searches += 1
+        board = ttt.result(board, action)
+    return ttt.winner(board), nodes, searches
+
+
+def play_games(method, opponent, indices, seed):
+    """
+    Plays the games with the given indices and returns their combined
+    statistics, including how much this process's caches were used.
+    """
+    table_before = dict(ttt.table_stats)
+    book_before = dict(ttt.book.stats)
+    results = {"X": 0, "O": 0, "tie": 0}
+    nodes = searches = 0
+    for index in indices:
+        winner, game_nodes, game_searches = play_game(method, opponent,
+                                                      index, seed)
+        results[winner or "tie"] += 1
+        nodes += game_nodes
+        searches += game_searches
+    return {
+        "results": results,
+        "nodes": nodes,
+        "searches": searches,
+        "table": {name: ttt.table_stats[name] - table_before[name]
+                  for name in table_before},
+        "book": {name: ttt.book.stats[name] - book_before[name]
+                 for name in book_before},
+    }
+
+
+def hit_rate(counts):
+    lookups = counts["hits"] + counts["misses"]
+    return counts["hits"] / lookups if lookups else None
+
+
+def run(games, opponent="self", method="book", workers=1, seed=0):
+    """
+    Plays games over workers processes and returns the report as a dict.
+    """
+    chunks = [range(start, games, workers) for start in range(workers)]
+    if method == "book":
+        # build any missing book once here rather than in every worker
+        ttt.book.get_book()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        parts = list(pool.map(play_games, [method] * workers,
+                              [opponent] * workers, chunks,
+                              [seed] * workers))
+    seconds = time.perf_counter() - start
+
+    total = {
+        "results": {"X": 0, "O": 0, "tie": 0},
+        "nodes": 0,
+        "searches": 0,
+        "table": {"hits": 0, "misses": 0},
+        "book": {"hits": 0, "misses": 0},
+    }
+    for part in parts:
+        total["nodes"] += part["nodes"]
+        total["searches"] += part["searches"]
+        for key in ("results", "table", "book"):
+            for name, value in part[key].items():
+                total[key][name] += value
+
+    return {
+        "games": games,
+        "opponent": opponent,
+        "method": method,
+        "workers": workers,
+        "seed": seed,
+        "seconds": seconds,
+        "games_per_sec": games / seconds,
+        "nodes": total["nodes"],
+        "nodes_per_sec": total["nodes"] / seconds,
+        "searches": total["searches"],
+        "table_hit_rate": hit_rate(total["table"]),
+        "book_hit_rate": hit_rate(total["book"]),
+        "results": total["results"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark self-play.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--opponent", choices=["self", "random"],
+                        default="self")
+    parser.add_argument("--method", choices=list(ttt.METHODS),
+                        default="book")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    report = run(args.games, args.opponent, args.method, args.workers,
+                 args.seed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
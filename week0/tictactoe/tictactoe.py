@@ -5,10 +5,38 @@ Tic Tac Toe Player
 import math
 import copy
 
+import bitboard
+import book
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# Order in which alpha-beta tries moves: center, then corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Positions visited by the most recent minimax search
+nodes = 0
+
+# Cell permutations for the 8 rotations and reflections of the board,
+# as indices into the board read row by row
+SYMMETRIES = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8],
+    [6, 3, 0, 7, 4, 1, 8, 5, 2],
+    [8, 7, 6, 5, 4, 3, 2, 1, 0],
+    [2, 5, 8, 1, 4, 7, 0, 3, 6],
+    [2, 1, 0, 5, 4, 3, 8, 7, 6],
+    [6, 7, 8, 3, 4, 5, 0, 1, 2],
+    [0, 3, 6, 1, 4, 7, 2, 5, 8],
+    [8, 5, 2, 7, 4, 1, 6, 3, 0],
+]
+
+# Transposition table: exact minimax scores keyed by canonical_key, where
+# a score counts a win n moves away as 1 / 2 ** n (negative for O)
+transpositions = {}
+table_stats = {"hits": 0, "misses": 0}
+
 
 def initial_state():
     """
@@ -224,10 +252,26 @@ def utility(board):
         return 0
 
 
-def minimax(board):
+def minimax(board, method="book"):
     """
     Returns the optimal action for the current player on the board.
+    All methods return the same action:
+    "full" expands the whole game tree, "alphabeta" prunes it,
+    "table" reuses positions solved by earlier calls, "bitboard"
+    does the same on the integer positions of bitboard.py, and "book"
+    looks the position up in book.py, searching only if it is missing.
+    """
+    if terminal(board):
+        return None
+    return METHODS[method](board)
+
+
+def full_search(board):
+    """
+    Returns the optimal action by expanding the full game tree.
     """
+    global nodes
+    nodes = 0
     turn = player(board)
     # in checking for X or O, the checker recurses until a terminal
     # condition is met and choosing the first optimal solution (1
@@ -236,6 +280,8 @@ def minimax(board):
     # is then appropriately sorted, with the action leading to
     # the highest/lowest score returned
     def max_check(board, recurse=0):
+        global nodes
+        nodes += 1
         if terminal(board):
             score = utility(board)
             # divide score based on how deep the recursion went by
@@ -250,6 +296,8 @@ def minimax(board):
             return (values_list[0])
 
     def min_check(board, recurse=0):
+        global nodes
+        nodes += 1
         if terminal(board):
             score = utility(board)
             # divide score based on how deep the recursion went by
@@ -274,3 +322,164 @@ def minimax(board):
     elif turn == O:
         action_list.sort(key=lambda tup: tup[1])
     return action_list[0][0]
+
+
+def ordered_actions(board):
+    """
+    Returns the available actions in MOVE_ORDER.
+    """
+    return [action for action in MOVE_ORDER
+            if board[action[0]][action[1]] == EMPTY]
+
+
+def alphabeta(board):
+    """
+    Returns the optimal action using alpha-beta pruning.
+    Scores match full_search (halved for every move deeper), and ties
+    go to the same action, the first best one in actions() order.
+    """
+    global nodes
+    nodes = 0
+    turn = player(board)
+
+    # value of a board reached depth moves below the root's children,
+    # exact when it lies strictly between alpha and beta
+    def value(board, depth, alpha, beta):
+        global nodes
+        nodes += 1
+        if terminal(board):
+            return utility(board) / 2 ** depth
+        if player(board) == X:
+            best = -math.inf
+            for action in ordered_actions(board):
+                best = max(best, value(result(board, action), depth + 1,
+                                       alpha, beta))
+                alpha = max(alpha, best)
+                if alpha >= beta:
+                    break
+        else:
+            best = math.inf
+            for action in ordered_actions(board):
+                best = min(best, value(result(board, action), depth + 1,
+                                       alpha, beta))
+                beta = min(beta, best)
+                if alpha >= beta:
+                    break
+        return best
+
+    # a later action only needs to be searched far enough to tell
+    # whether it is strictly better than the best so far
+    best_action = None
+    best = None
+    for action in actions(board):
+        if turn == X:
+            score = value(result(board, action), 0,
+                          -math.inf if best is None else best, math.inf)
+            if best is None or score > best:
+                best_action, best = action, score
+        else:
+            score = value(result(board, action), 0,
+                          -math.inf, math.inf if best is None else best)
+            if best is None or score < best:
+                best_action, best = action, score
+    return best_action
+
+
+def canonical_key(board):
+    """
+    Returns the same integer for a board and all of its rotations and
+    reflections.
+    """
+    digits = [0 if cell == EMPTY else 1 if cell == X else 2
+              for row in board for cell in row]
+    key = None
+    for symmetry in SYMMETRIES:
+        code = 0
+        for i in symmetry:
+            code = code * 3 + digits[i]
+        if key is None or code < key:
+            key = code
+    return key
+
+
+def solve(board):
+    """
+    Returns the exact minimax score of a board, solving each position
+    (up to symmetry) once and keeping it in the transposition table.
+    """
+    global nodes
+    key = canonical_key(board)
+    score = transpositions.get(key)
+    if score is not None:
+        table_stats["hits"] += 1
+        return score
+    table_stats["misses"] += 1
+    nodes += 1
+    if terminal(board):
+        score = utility(board)
+    else:
+        scores = [solve(result(board, action)) for action in actions(board)]
+        # a score found one move deeper counts half as much
+        score = (max(scores) if player(board) == X else min(scores)) / 2
+    transpositions[key] = score
+    return score
+
+
+def table_search(board):
+    """
+    Returns the optimal action using the transposition table. Ties go to
+    the first best action in actions() order, as in full_search.
+    """
+    global nodes
+    nodes = 0
+    turn = player(board)
+    best_action = None
+    best = None
+    for action in actions(board):
+        score = solve(result(board, action))
+        if (best is None or (turn == X and score > best)
+                or (turn == O and score < best)):
+            best_action, best = action, score
+    return best_action
+
+
+def clear_transpositions():
+    """
+    Empties the transposition table and resets its statistics.
+    """
+    transpositions.clear()
+    table_stats["hits"] = 0
+    table_stats["misses"] = 0
+
+
+def bitboard_search(board):
+    """
+    Returns the optimal action using the bitboard engine.
+    """
+    global nodes
+    action = bitboard.minimax(board)
+    nodes = bitboard.nodes
+    return action
+
+
+def book_search(board):
+    """
+    Returns the book's action for the board, falling back to the
+    transposition table for positions the book does not know.
+    """
+    global nodes
+    action = book.lookup(board)
+    if action is None:
+        return table_search(board)
+    nodes = 0
+    return action
+
+
+# Search methods available to minimax
+METHODS = {
+    "full": full_search,
+    "alphabeta": alphabeta,
+    "table": table_search,
+    "bitboard": bitboard_search,
+    "book": book_search,
+}
@@ -0,0 +1,145 @@
+"""
+Compares the model_check methods.
+
+Checks the puzzles, then random knowledge bases of clauses over a
+growing number of symbols, and reports for each method its answers,
+the time taken and, for the methods that enumerate models, the size of
+the model space (2 ** symbols per query) over that time; they may stop
+early at a counterexample. Every method must give the same answers.
+
+With --simplify, each knowledge base is instead simplified first, and
+its size and CNF clauses, and the time each method and the CNF encoding
+take, are reported before and after; the answers must not change.
+
+Usage: python benchmark.py [--symbols N ...] [--clauses C] [--seed S]
+           [--block-size K] [--methods METHOD ...] [--simplify]
+"""
+
+import argparse
+import random
+import time
+
+import puzzle
+from logic import (And, BLOCK_SIZE, CNF, Implication, METHODS, Not, Or,
+                   Symbol, model_check, simplify, size)
+
+# Methods that evaluate every model
+ENUMERATING = ["enumerate", "compiled", "blocks"]
+
+
+def random_knowledge(rng, symbols, clauses):
+    """
+    Returns a knowledge base of random 3-literal clauses plus a chain of
+    implications through every symbol, and the queries to check.
+    """
+    names = [Symbol(f"S{i}") for i in range(symbols)]
+    conjuncts = [Implication(names[i], names[i + 1])
+                 for i in range(symbols - 1)]
+    for _ in range(clauses):
+        conjuncts.append(Or(*[
+            name if rng.random() < 0.5 else Not(name)
+            for name in rng.sample(names, 3)]))
+    queries = [Implication(names[0], names[-1]), names[0], Not(names[-1])]
+    return And(*conjuncts), queries
+
+
+def measure(knowledge, queries, method, block_size):
+    """
+    Returns (answers, seconds) for checking every query.
+    """
+    start = time.perf_counter()
+    answers = [model_check(knowledge, query, method, block_size)
+               for query in queries]
+    return answers, time.perf_counter() - start
+
+
+def encode(knowledge):
+    """
+    Returns (clauses, seconds) for encoding knowledge as CNF.
+    """
+    start = time.perf_counter()
+    cnf = CNF()
+    cnf.add(knowledge)
+    return len(cnf.clauses), time.perf_counter() - start
+
+
+def compare_simplified(problems, methods, block_size):
+    """
+    Prints the size, CNF encoding and model_check times of each knowledge
+    base before and after simplify, checking the answers agree.
+    """
+    print(f"{'problem':>12}{'size':>14}{'clauses':>14}{'simplify':>10}"
+          f"{'method':>11}{'before':>10}{'after':>10}")
+    for name, knowledge, queries in problems:
+        start = time.perf_counter()
+        simplified = simplify(knowledge)
+        elapsed = time.perf_counter() - start
+        clauses, encoding = encode(knowledge)
+        simplified_clauses, simplified_encoding = encode(simplified)
+        print(f"{name:>12}{size(knowledge):>7}{size(simplified):>7}"
+              f"{clauses:>7}{simplified_clauses:>7}{elapsed:>10.3f}"
+              f"{'cnf':>11}{encoding:>10.3f}{simplified_encoding:>10.3f}")
+        for method in methods:
+            answers, before = measure(knowledge, queries, method, block_size)
+            simplified_answers, after = measure(simplified, queries, method,
+                                                block_size)
+            if simplified_answers != answers:
+                raise Exception(f"{method} disagrees on simplified {name}")
+            print(f"{'':>50}{method:>11}{before:>10.3f}{after:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model_check.")
+    parser.add_argument("--symbols", type=int, nargs="+",
+                        default=[8, 12, 16, 20])
+    parser.add_argument("--clauses", type=int, default=None,
+                        help="random clauses per knowledge base "
+                             "(default: 1 per symbol)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    parser.add_argument("--methods", nargs="+", choices=METHODS,
+                        default=METHODS)
+    parser.add_argument("--simplify", action="store_true",
+                        help="compare each knowledge base with its "
+                             "simplified form")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    problems = []
+    characters = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+                  puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    for name, knowledge in [("puzzle 0", puzzle.knowledge0),
+                            ("puzzle 1", puzzle.knowledge1),
+                            ("puzzle 2", puzzle.knowledge2),
+                            ("puzzle 3", puzzle.knowledge3)]:
+        problems.append((name, knowledge, characters))
+    for symbols in args.symbols:
+        clauses = symbols if args.clauses is None else args.clauses
+        knowledge, queries = random_knowledge(rng, symbols, clauses)
+        problems.append((f"{symbols} symbols", knowledge, queries))
+
+    if args.simplify:
+        compare_simplified(problems, args.methods, args.block_size)
+        return
+
+    print(f"{'problem':>12}{'method':>11}{'seconds':>10}{'space/s':>14}"
+          f"  answers")
+    for name, knowledge, queries in problems:
+        symbols = len(knowledge.symbols())
+        expected = None
+        for method in args.methods:
+            answers, elapsed = measure(knowledge, queries, method,
+                                       args.block_size)
+            if expected is None:
+                expected = answers
+            elif answers != expected:
+                raise Exception(f"{method} disagrees on {name}")
+            rate = ""
+            if method in ENUMERATING:
+                rate = f"{len(queries) * 2 ** symbols / elapsed:,.0f}"
+            print(f"{name:>12}{method:>11}{elapsed:>10.3f}{rate:>14}  "
+                  + "".join("T" if answer else "F" for answer in answers))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,53 @@
+import hashlib
 import itertools
+import weakref
+
+from sat import Solver
+
+# Models evaluated together by block_check, as a power of 2
+BLOCK_SIZE = 16
+
+# Ways model_check can decide entailment
+METHODS = ["enumerate", "compiled", "blocks", "sat"]
 
 
 class Sentence():
+    """A logical sentence.
+
+    Sentences are immutable and hash-consed: building a sentence equal to
+    one that already exists returns that same object, so equal sentences
+    share memory, equality is identity and hashing is by id. Each one
+    keeps the frozenset of its symbol names, and its size, order key and
+    canonical forms, once they have been needed.
+    """
+
+    __slots__ = ("_symbols", "_size", "_order", "_canonical", "_complement",
+                 "__weakref__")
+
+    # Sentences in use, by class and operands (or name, for symbols)
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def make(cls, key, fields):
+        """Returns the interned sentence of class cls for key, building
+        it with the given fields if it is new."""
+        key = (cls,) + key
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            for name in ("_symbols", "_size", "_order", "_canonical",
+                         "_complement"):
+                object.__setattr__(sentence, name, None)
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +59,32 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_names())
+
+    def symbol_names(self):
+        """Returns the frozenset of symbol names in the sentence, found
+        without recursion the first time it is asked for."""
+        if self._symbols is None:
+            names = set()
+            seen = set()
+            pending = [self]
+            while pending:
+                top = pending.pop()
+                if top._symbols is not None:
+                    names |= top._symbols
+                elif isinstance(top, Symbol):
+                    names.add(top.name)
+                else:
+                    for operand in operands(top):
+                        if operand not in seen:
+                            seen.add(operand)
+                            pending.append(operand)
+            object.__setattr__(self, "_symbols", frozenset(names))
+        return self._symbols
+
+    def compile(self, ids=None):
+        """Returns the sentence compiled to evaluate models packed into ints."""
+        return Compiled(self, ids)
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +114,13 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        return cls.make((name,), {"name": name})
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __reduce__(self):
+        return (type(self), (self.name,))
 
     def __repr__(self):
         return self.name
@@ -65,20 +134,16 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
-
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.make((operand,), {"operand": operand})
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __reduce__(self):
+        return (type(self), (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +154,17 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        return cls.make(conjuncts, {"conjuncts": conjuncts})
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def __reduce__(self):
+        return (type(self), self.conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +173,12 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        raise TypeError("sentences are immutable, use "
+                        "knowledge = knowledge.extended(conjunct)")
+
+    def extended(self, *conjuncts):
+        """Returns the conjunction of these conjuncts and the new ones."""
+        return type(self)(*self.conjuncts, *conjuncts)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,23 +189,17 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return cls.make(disjuncts, {"disjuncts": disjuncts})
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def __reduce__(self):
+        return (type(self), self.disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +214,18 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.make((antecedent, consequent),
+                        {"antecedent": antecedent, "consequent": consequent})
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __reduce__(self):
+        return (type(self), (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +239,17 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return cls.make((left, right), {"left": left, "right": right})
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __reduce__(self):
+        return (type(self), (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,12 +265,387 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+# The empty conjunction, always true, and the empty disjunction, never true
+TRUE = And()
+FALSE = Or()
+
+# Classes in the order order_key puts sentences of the same size in
+CLASS_ORDER = ["Symbol", "Not", "And", "Or", "Implication", "Biconditional"]
+
+# Most operands combine flattens a nested And or Or of, and largest
+# sentence it propagates from or into, so that simplify stays linear in
+# the size of the sentence rather than redoing whole subsentences at
+# every level of a deep one
+SIMPLIFY_LIMIT = 64
+
+
+def size(sentence):
+    """Returns the number of nodes evaluate visits in sentence, counting
+    a shared subsentence once for every place it appears."""
+    if sentence._size is not None:
+        return sentence._size
+    pending = [sentence]
+    while pending:
+        top = pending[-1]
+        if top._size is not None:
+            pending.pop()
+            continue
+        missing = [operand for operand in operands(top)
+                   if operand._size is None]
+        if missing:
+            pending.extend(missing)
+            continue
+        pending.pop()
+        object.__setattr__(top, "_size", 1 + sum(
+            operand._size for operand in operands(top)))
+    return sentence._size
+
+
+def order_key(sentence):
+    """Returns (size, class, name or fingerprint) for sentence, where the
+    fingerprint is a digest of its class and its operands' keys, so that
+    smaller operands sort first and equal sentences always get the same
+    key, whatever else has been sorted before."""
+    if sentence._order is not None:
+        return sentence._order
+    pending = [sentence]
+    while pending:
+        top = pending[-1]
+        if top._order is not None:
+            pending.pop()
+            continue
+        missing = [operand for operand in operands(top)
+                   if operand._order is None]
+        if missing:
+            pending.extend(missing)
+            continue
+        pending.pop()
+        rank = CLASS_ORDER.index(type(top).__name__)
+        if isinstance(top, Symbol):
+            key = (1, rank, top.name)
+        else:
+            digest = hashlib.blake2b(bytes([rank]), digest_size=16)
+            for operand in operands(top):
+                digest.update(fingerprint(operand))
+            key = (size(top), rank, digest.digest())
+        object.__setattr__(top, "_order", key)
+    return sentence._order
+
+
+def fingerprint(sentence):
+    """Returns the digest order_key gives sentence, or for a symbol a
+    digest of its name."""
+    if isinstance(sentence, Symbol):
+        return hashlib.blake2b(sentence.name.encode("utf-8"),
+                               digest_size=16).digest()
+    return order_key(sentence)[2]
+
+
+def negation(sentence):
+    """Returns the negation of sentence, without a double Not."""
+    if sentence is TRUE:
+        return FALSE
+    if sentence is FALSE:
+        return TRUE
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def canonical(sentence):
+    """Returns the form combine compares sentence by: a Not of an And or
+    Or, or an Implication, is rewritten as an Or or And of its operands
+    (negated as needed), one level down, so that equivalent operands
+    written either way are recognized as the same. Sentences bigger than
+    SIMPLIFY_LIMIT are their own canonical form."""
+    form = sentence._canonical
+    if form is not None:
+        return form
+    if size(sentence) > SIMPLIFY_LIMIT:
+        kind, parts = None, None
+    elif isinstance(sentence, Not) and isinstance(sentence.operand,
+                                                  (And, Or)):
+        kind = Or if isinstance(sentence.operand, And) else And
+        parts = [negation(operand) for operand in operands(sentence.operand)]
+    elif isinstance(sentence, Implication):
+        kind = Or
+        parts = [negation(sentence.antecedent), sentence.consequent]
+    else:
+        kind, parts = None, None
+    if kind is None:
+        form = sentence
+    else:
+        flat = []
+        for part in parts:
+            for operand in (operands(part) if type(part) is kind
+                            else [part]):
+                if operand not in flat:
+                    flat.append(operand)
+        form = flat[0] if len(flat) == 1 else kind(*sorted(flat,
+                                                           key=order_key))
+    object.__setattr__(sentence, "_canonical", form)
+    return form
+
+
+def complement(sentence):
+    """Returns the canonical form of the negation of sentence."""
+    form = sentence._complement
+    if form is None:
+        form = canonical(negation(sentence))
+        object.__setattr__(sentence, "_complement", form)
+    return form
+
+
+def smallest(*candidates):
+    """Returns the first of the equivalent candidates with the least size."""
+    return min(candidates, key=size)
+
+
+def simplify(sentence):
+    """Returns an equivalent sentence that is no bigger, as counted by
+    size, and usually smaller.
+
+    Nested Ands and Ors are flattened, and duplicate and constant
+    operands removed. An operand of an And is true for its other
+    operands, and one of an Or false, so wherever it (or its negation)
+    appears inside them it is replaced by a constant, which also removes
+    tautologies like a => a. Negations are pushed down to the symbols,
+    and implications and biconditionals rewritten with And, Or and Not,
+    to give negation normal form wherever that is no bigger. The result
+    is TRUE or FALSE when these rewrites show that the sentence always or
+    never holds.
+
+    The rewrites are repeated until they give a sentence already seen,
+    and the least of those by order_key is returned, so the result only
+    depends on the sentence and simplifying it again changes nothing.
+    """
+    seen = []
+    while sentence not in seen:
+        seen.append(sentence)
+        sentence = simplify_pass(sentence)
+    return min(seen[seen.index(sentence):], key=order_key)
+
+
+def simplify_pass(sentence):
+    """Returns sentence rewritten once by the rules of simplify.
+
+    Each subsentence is rewritten once for each polarity it is needed in,
+    however often it appears, and deep sentences are walked without
+    recursion.
+    """
+    # rewritten subsentences by (subsentence, True), and their negations
+    # by (subsentence, False)
+    done = {}
+    pending = [(sentence, True)]
+    while pending:
+        top = pending[-1]
+        if top in done:
+            pending.pop()
+            continue
+        missing = [key for key in needs(*top) if key not in done]
+        if missing:
+            pending.extend(missing)
+            continue
+        pending.pop()
+        done[top] = rewrite(*top, done)
+    return done[(sentence, True)]
+
+
+def needs(sentence, positive):
+    """Returns the (subsentence, polarity) pairs rewrite needs to rewrite
+    sentence, or its negation if not positive."""
+    if isinstance(sentence, Symbol):
+        return []
+    if isinstance(sentence, Not):
+        return [(sentence.operand, not positive)]
+    # a negation may be no smaller than the negated sentence
+    pairs = [] if positive else [(sentence, True)]
+    if isinstance(sentence, (And, Or)):
+        return pairs + [(operand, positive) for operand in operands(sentence)]
+    return pairs + [(operand, polarity) for operand in operands(sentence)
+                    for polarity in (True, False)]
+
+
+def rewrite(sentence, positive, done):
+    """Returns sentence, or its negation if not positive, simplified, given
+    the rewritten pairs it needs in done."""
+    if isinstance(sentence, Symbol):
+        return sentence if positive else Not(sentence)
+    if isinstance(sentence, Not):
+        return done[(sentence.operand, not positive)]
+    negated = () if positive else (negation(done[(sentence, True)]),)
+    if isinstance(sentence, (And, Or)):
+        conjunction = isinstance(sentence, And) == positive
+        return smallest(combine([done[(operand, positive)]
+                                 for operand in operands(sentence)],
+                                conjunction), *negated)
+    a, b = [(done[(operand, True)], done[(operand, False)])
+            for operand in operands(sentence)]
+    if isinstance(sentence, Implication):
+        # a => b is (not a) or b, and its negation a and (not b)
+        if positive:
+            return smallest(combine([a[1], b[0]], False),
+                            fold(Implication, [a[0], b[0]]))
+        return smallest(combine([a[0], b[1]], True), *negated)
+    # a <=> b is (a and b) or (not a and not b), and its negation
+    # (a and not b) or (not a and b)
+    if positive:
+        return smallest(combine([combine([a[0], b[0]], True),
+                                 combine([a[1], b[1]], True)], False),
+                        fold(Biconditional, [a[0], b[0]]))
+    return smallest(combine([combine([a[0], b[1]], True),
+                             combine([a[1], b[0]], True)], False),
+                    fold(Biconditional, [a[0], b[1]]), *negated)
+
+
+def combine(parts, conjunction, propagate=True):
+    """Returns the simplified And (or Or, if not conjunction) of parts,
+    which are already simplified.
+
+    With propagate, each operand is taken as true (or false) inside the
+    others, until that changes nothing more. Parts with more than
+    SIMPLIFY_LIMIT operands are kept nested rather than flattened, and
+    operands bigger than that neither propagate nor are propagated into."""
+    unit, zero = (TRUE, FALSE) if conjunction else (FALSE, TRUE)
+    kind = And if conjunction else Or
+    while True:
+        flat = []
+        forms = []
+        seen = set()
+        for part in parts:
+            nested = (type(part) is kind
+                      and len(operands(part)) <= SIMPLIFY_LIMIT)
+            for operand in operands(part) if nested else [part]:
+                if operand is zero:
+                    return zero
+                form = operand._canonical or canonical(operand)
+                if operand is not unit and form not in seen:
+                    seen.add(form)
+                    flat.append(operand)
+                    forms.append(form)
+        # complements are only looked for among small operands
+        opposites = [operand._complement or complement(operand)
+                     if size(operand) <= SIMPLIFY_LIMIT else None
+                     for operand in flat]
+        if any(form in seen for form in opposites):
+            return zero
+        if not propagate or len(flat) < 2:
+            break
+
+        # only small operands, other than literals, that share a symbol
+        # with another small operand can change
+        small = [i for i, operand in enumerate(flat)
+                 if size(operand) <= SIMPLIFY_LIMIT]
+        names = set()
+        shared = set()
+        for i in small:
+            shared |= names & flat[i].symbol_names()
+            names |= flat[i].symbol_names()
+        changing = [i for i in small
+                    if not isinstance(flat[i], Symbol)
+                    and not (isinstance(flat[i], Not)
+                             and isinstance(flat[i].operand, Symbol))
+                    and not flat[i].symbol_names().isdisjoint(shared)]
+        if not changing:
+            break
+        known = {}
+        for i in small:
+            known[forms[i]] = conjunction
+            known[opposites[i]] = not conjunction
+        parts = list(flat)
+        for i in changing:
+            parts[i] = replace(flat[i], known, (forms[i], opposites[i]),
+                               names)
+        if parts == flat:
+            break
+
+    if len(flat) == 1:
+        return flat[0]
+    # a fixed order makes operands that only differ in order the same,
+    # and putting small ones first lets evaluate stop sooner
+    return kind(*sorted(flat, key=order_key))
+
+
+def fold(kind, parts):
+    """Returns the sentence of class kind with operands parts, already
+    simplified, with any constants folded away."""
+    if kind is And or kind is Or:
+        return combine(parts, kind is And, propagate=False)
+    if kind is Not:
+        return negation(parts[0])
+    a, b = parts
+    if kind is Implication:
+        if a is FALSE or b is TRUE or a is b:
+            return TRUE
+        if a is TRUE:
+            return b
+        if b is FALSE:
+            return negation(a)
+        return Implication(a, b)
+    if a is TRUE or b is TRUE:
+        return b if a is TRUE else a
+    if a is FALSE or b is FALSE:
+        return negation(b if a is FALSE else a)
+    if a is b:
+        return TRUE
+    if negation(a) is b:
+        return FALSE
+    return Biconditional(a, b)
+
+
+def replace(sentence, known, skip=(), names=None):
+    """Returns sentence with each subsentence below it whose canonical
+    form is a key of known (a dict from sentence to bool), other than
+    those in skip, replaced by that constant, and the constants folded
+    away. names are the symbol names of the keys, if already known."""
+    if names is None:
+        names = frozenset().union(*[key.symbol_names() for key in known])
+    replaced = {}
+    pending = [sentence]
+    while pending:
+        top = pending[-1]
+        if top in replaced:
+            pending.pop()
+            continue
+        form = canonical(top)
+        if top is not sentence and form in known and form not in skip:
+            replaced[top] = TRUE if known[form] else FALSE
+            pending.pop()
+            continue
+        if top.symbol_names().isdisjoint(names):
+            replaced[top] = top
+            pending.pop()
+            continue
+        missing = [operand for operand in operands(top)
+                   if operand not in replaced]
+        if missing:
+            pending.extend(missing)
+            continue
+        pending.pop()
+        parts = [replaced[operand] for operand in operands(top)]
+        if parts == list(operands(top)):
+            replaced[top] = top
+        else:
+            replaced[top] = fold(type(top), parts)
+    return replaced[sentence]
+
+
+def model_check(knowledge, query, method="enumerate",
+                block_size=BLOCK_SIZE):
+    """Checks if knowledge base entails query.
+
+    "enumerate" evaluates the sentences on every model, "compiled" does
+    the same with compiled sentences, "blocks" evaluates compiled
+    sentences on 2 ** block_size models at once, and "sat" asks a SAT
+    solver.
+    """
+    if method == "compiled":
+        return compiled_check(knowledge, query)
+    if method == "blocks":
+        return block_check(knowledge, query, block_size)
+    if method == "sat":
+        return sat_check(knowledge, query)
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -261,3 +680,402 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+class CNF():
+    """Clauses equivalent to a set of sentences, over integer literals.
+
+    Each symbol is interned as a variable numbered from 1, and each
+    And, Or, Implication or Biconditional gets a variable of its own
+    defined by a few clauses (the Tseitin encoding), so the clauses grow
+    linearly with the sentences. A literal is a variable or its negation,
+    as in the DIMACS format.
+    """
+
+    def __init__(self):
+        self.variables = 0
+        self.clauses = []
+
+        # symbol names and their variables, both ways
+        self.ids = {}
+        self.names = {}
+
+        # literals of sentences already encoded, by id, with the
+        # sentence kept alive so the id stays unique
+        self.encoded = {}
+
+    def symbol(self, name):
+        """Returns the variable of a symbol, interning it if it is new."""
+        if name not in self.ids:
+            self.ids[name] = self.new_variable()
+            self.names[self.ids[name]] = name
+        return self.ids[name]
+
+    def new_variable(self):
+        self.variables += 1
+        return self.variables
+
+    def add(self, sentence):
+        """Adds clauses requiring sentence to be true."""
+        for conjunct in conjuncts(sentence):
+            if isinstance(conjunct, Or):
+                self.clauses.append([self.literal(disjunct)
+                                     for disjunct in conjunct.disjuncts])
+            elif isinstance(conjunct, Implication):
+                self.clauses.append([-self.literal(conjunct.antecedent),
+                                     self.literal(conjunct.consequent)])
+            else:
+                self.clauses.append([self.literal(conjunct)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to sentence, adding the clauses
+        that define it. Works bottom-up with an explicit stack, so deeply
+        nested sentences do not hit the recursion limit."""
+        pending = [sentence]
+        while pending:
+            top = pending[-1]
+            if id(top) in self.encoded:
+                pending.pop()
+                continue
+            missing = [operand for operand in operands(top)
+                       if id(operand) not in self.encoded]
+            if missing:
+                pending.extend(missing)
+                continue
+            pending.pop()
+            self.encoded[id(top)] = (top, self.encode(top))
+        return self.encoded[id(sentence)][1]
+
+    def encode(self, sentence):
+        """Returns the literal of sentence, whose operands are encoded."""
+        literals = [self.encoded[id(operand)][1]
+                    for operand in operands(sentence)]
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        if isinstance(sentence, Not):
+            return -literals[0]
+        if isinstance(sentence, And):
+            return self.gate(literals, "and")
+        if isinstance(sentence, Or):
+            return self.gate(literals, "or")
+        if isinstance(sentence, Implication):
+            return self.gate([-literals[0], literals[1]], "or")
+        left, right = literals
+        gate = self.new_variable()
+        self.clauses.append([-gate, -left, right])
+        self.clauses.append([-gate, left, -right])
+        self.clauses.append([gate, left, right])
+        self.clauses.append([gate, -left, -right])
+        return gate
+
+    def gate(self, literals, kind):
+        """Returns a new variable true exactly when all ("and") or any
+        ("or") of literals are."""
+        gate = self.new_variable()
+        sign = 1 if kind == "and" else -1
+        for literal in literals:
+            self.clauses.append([-sign * gate, sign * literal])
+        self.clauses.append([sign * gate] + [-sign * literal
+                                             for literal in literals])
+        return gate
+
+    def to_dimacs(self):
+        """Returns the clauses in DIMACS CNF format, with the symbol of
+        each interned variable in a comment line."""
+        lines = [f"c {variable} {name}"
+                 for variable, name in sorted(self.names.items())]
+        lines.append(f"p cnf {self.variables} {len(self.clauses)}")
+        for clause in self.clauses:
+            lines.append(" ".join(str(literal) for literal in clause) + " 0")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def from_dimacs(cls, text):
+        """Reads clauses, and symbol comments, written by to_dimacs."""
+        cnf = cls()
+        clause = []
+        for line in text.splitlines():
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == "c":
+                if len(fields) > 2 and fields[1].isdigit():
+                    name = line.split(None, 2)[2]
+                    cnf.ids[name] = int(fields[1])
+                    cnf.names[int(fields[1])] = name
+            elif fields[0] == "p":
+                cnf.variables = int(fields[2])
+            else:
+                for field in fields:
+                    if field == "0":
+                        cnf.clauses.append(clause)
+                        clause = []
+                    else:
+                        clause.append(int(field))
+        return cnf
+
+    def solver(self):
+        """Returns a Solver loaded with the clauses."""
+        solver = Solver()
+        solver.reserve(self.variables)
+        for clause in self.clauses:
+            solver.add_clause(clause)
+        return solver
+
+
+def operands(sentence):
+    """Returns the sentences sentence is directly built from."""
+    if isinstance(sentence, Symbol):
+        return []
+    if isinstance(sentence, Not):
+        return [sentence.operand]
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    if isinstance(sentence, Or):
+        return sentence.disjuncts
+    if isinstance(sentence, Implication):
+        return [sentence.antecedent, sentence.consequent]
+    if isinstance(sentence, Biconditional):
+        return [sentence.left, sentence.right]
+    raise Exception(f"cannot convert {sentence} to clauses")
+
+
+def sat_check(knowledge, query):
+    """Checks if knowledge base entails query, by asking a SAT solver
+    whether knowledge and not query can both be true."""
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return not cnf.solver().solve()
+
+
+class Compiled():
+    """A sentence compiled to straight-line Python code.
+
+    A model is an int in which bit ids[name] is the value of the symbol
+    called name. Subsentences are evaluated with bitwise operators on 0
+    and 1, and shared subsentences are only computed once. evaluate
+    tests the conjuncts of a top-level And smallest first and returns as
+    soon as one fails, so most models only pay for a small part of it.
+
+    evaluate_block(words, full) runs the same code on many models at
+    once: words[ids[name]] holds the value of name in model j as bit j,
+    and full has a 1 bit for every model.
+    """
+
+    def __init__(self, sentence, ids=None):
+        if ids is None:
+            ids = {name: bit
+                   for bit, name in enumerate(sorted(sentence.symbols()))}
+        self.ids = ids
+
+        lines = []
+        names = {}
+        for conjunct in sorted(conjuncts(sentence), key=size):
+            part, result = straight_line(conjunct, ids, "m >> {} & 1", "1",
+                                         names)
+            lines += part + [f"    if not {result}:", "        return False"]
+        self.source = "def evaluate(m):\n" + "\n".join(
+            lines + ["    return True"]) + "\n"
+        lines, result = straight_line(sentence, ids, "w[{}]", "full")
+        self.block_source = "def evaluate_block(w, full):\n" + "\n".join(
+            lines + [f"    return {result}"]) + "\n"
+
+        namespace = {}
+        exec(self.source, namespace)
+        exec(self.block_source, namespace)
+        self.evaluate = namespace["evaluate"]
+        self.evaluate_block = namespace["evaluate_block"]
+
+    def __call__(self, model):
+        return self.evaluate(model)
+
+    def pack(self, model):
+        """Returns a dict model, as used by evaluate, packed into an int."""
+        packed = 0
+        for name, bit in self.ids.items():
+            if model[name]:
+                packed |= 1 << bit
+        return packed
+
+    def blocks(self, size):
+        """Yields (first, words, full) for every block of 2 ** size models
+        (fewer if there are fewer symbols), numbered as in evaluate, with
+        model first + j in bit j of each word."""
+        symbols = max(self.ids.values(), default=-1) + 1
+        size = min(size, symbols)
+        models = 2 ** size
+        full = (1 << models) - 1
+
+        # in-block symbols repeat 2 ** bit zeros then 2 ** bit ones,
+        # built by doubling as big int division would be slow
+        words = []
+        for bit in range(size):
+            word = ((1 << 2 ** bit) - 1) << 2 ** bit
+            width = 2 ** (bit + 1)
+            while width < models:
+                word |= word << width
+                width *= 2
+            words.append(word)
+
+        for block in range(2 ** (symbols - size)):
+            yield block * models, words + [
+                full if block >> bit & 1 else 0
+                for bit in range(symbols - size)], full
+
+
+def conjuncts(sentence):
+    """Returns the operands of sentence's top-level And, with nested Ands
+    flattened, or just sentence if it is not an And."""
+    flat = []
+    pending = [sentence]
+    while pending:
+        top = pending.pop()
+        if isinstance(top, And):
+            pending.extend(reversed(top.conjuncts))
+        else:
+            flat.append(top)
+    return flat
+
+
+def straight_line(sentence, ids, leaf, one, names=None):
+    """Returns (lines, result) of Python code computing sentence into the
+    variable result, reading the symbol called name with
+    leaf.format(ids[name]) and taking one as all-true. Subsentences in
+    names, which maps the id of each one computed to (subsentence,
+    variable) and is updated, are not computed again."""
+    lines = []
+    if names is None:
+        names = {}
+    pending = [sentence]
+    while pending:
+        top = pending[-1]
+        if id(top) in names:
+            pending.pop()
+            continue
+        missing = [operand for operand in operands(top)
+                   if id(operand) not in names]
+        if missing:
+            pending.extend(missing)
+            continue
+        pending.pop()
+        values = [names[id(operand)][1] for operand in operands(top)]
+        if isinstance(top, Symbol):
+            expression = leaf.format(ids[top.name])
+        elif isinstance(top, Not):
+            expression = f"{values[0]} ^ {one}"
+        elif isinstance(top, And):
+            expression = " & ".join(values) or one
+        elif isinstance(top, Or):
+            expression = " | ".join(values) or "0"
+        elif isinstance(top, Implication):
+            expression = f"({values[0]} ^ {one}) | {values[1]}"
+        else:
+            expression = f"{values[0]} ^ {values[1]} ^ {one}"
+        value = f"t{len(names)}"
+        lines.append(f"    {value} = {expression}")
+        names[id(top)] = (top, value)
+    return lines, names[id(sentence)][1]
+
+
+def compiled_check(knowledge, query):
+    """Checks if knowledge base entails query, by evaluating a compiled
+    test for a counterexample on every model."""
+    counterexample = And(knowledge, Not(query)).compile()
+    evaluate = counterexample.evaluate
+    for model in range(2 ** len(counterexample.ids)):
+        if evaluate(model):
+            return False
+    return True
+
+
+def block_check(knowledge, query, block_size=BLOCK_SIZE):
+    """Checks if knowledge base entails query, by evaluating a compiled
+    test for a counterexample on blocks of 2 ** block_size models at a
+    time, one bit per model."""
+    counterexample = And(knowledge, Not(query)).compile()
+    evaluate_block = counterexample.evaluate_block
+    for first, words, full in counterexample.blocks(block_size):
+        if evaluate_block(words, full):
+            return False
+    return True
+
+
+def model_check_all(knowledge, queries, method="blocks",
+                    block_size=BLOCK_SIZE):
+    """Returns, for each query, whether knowledge base entails it.
+
+    With "blocks", the models of the knowledge base are enumerated once,
+    in blocks of 2 ** block_size, and every query is checked against
+    them. With "sat", the knowledge base is encoded once and each query
+    is one more call to the same solver, which keeps what it learnt.
+    """
+    if method == "sat":
+        cnf = CNF()
+        cnf.add(knowledge)
+        literals = [cnf.literal(query) for query in queries]
+        solver = cnf.solver()
+        return [not solver.solve([-literal]) for literal in literals]
+
+    symbols = set.union(knowledge.symbols(),
+                        *[query.symbols() for query in queries])
+    ids = {name: bit for bit, name in enumerate(sorted(symbols))}
+    compiled = knowledge.compile(ids)
+    evaluators = [query.compile(ids).evaluate_block for query in queries]
+    entailed = [True] * len(queries)
+    for first, words, full in compiled.blocks(block_size):
+        models = compiled.evaluate_block(words, full)
+        if not models:
+            continue
+        for i, evaluate_block in enumerate(evaluators):
+            if entailed[i] and models & ~evaluate_block(words, full):
+                entailed[i] = False
+        if not any(entailed):
+            break
+    return entailed
+
+
+def satisfying_models(knowledge, symbols=None, method="blocks",
+                      block_size=BLOCK_SIZE):
+    """Yields every model, a dict from symbol name to bool, over symbols
+    (by default those of knowledge) in which knowledge is true. Symbols
+    of knowledge not in symbols are projected away: each model is yielded
+    once if knowledge holds for some values of them.
+
+    Models are found lazily: "blocks" evaluates blocks of 2 ** block_size
+    models as they are needed, and "sat" asks a solver for one model at a
+    time, ruling out each one it has returned.
+    """
+    if symbols is None:
+        symbols = knowledge.symbols()
+    names = sorted(symbols)
+
+    if method == "sat":
+        cnf = CNF()
+        cnf.add(knowledge)
+        variables = [cnf.symbol(name) for name in names]
+        solver = cnf.solver()
+        while solver.solve():
+            model = solver.model()
+            yield {name: variable in model
+                   for name, variable in zip(names, variables)}
+            solver.add_clause([-variable if variable in model else variable
+                               for variable in variables])
+        return
+
+    # projected-away symbols take the low bits, so the models that only
+    # differ in them come one after another
+    hidden = sorted(knowledge.symbols() - set(names))
+    ids = {name: bit for bit, name in enumerate(hidden + names)}
+    compiled = knowledge.compile(ids)
+    last = None
+    for first, words, full in compiled.blocks(block_size):
+        models = compiled.evaluate_block(words, full)
+        while models:
+            low = models & -models
+            packed = first + low.bit_length() - 1
+            models ^= low
+            if packed >> len(hidden) == last:
+                continue
+            last = packed >> len(hidden)
+            yield {name: bool(packed >> ids[name] & 1) for name in names}
@@ -0,0 +1,336 @@
+"""CDCL satisfiability solver over integer clauses.
+
+Variables are numbered from 1 and a literal is a variable or its
+negation, as in the DIMACS format: 3 means variable 3 is true and -3
+that it is false. The solver propagates units through two watched
+literals per clause, learns a first-UIP clause from every conflict,
+picks decision variables by VSIDS activity, restarts on a Luby
+schedule and drops its longest learnt clauses as they pile up.
+"""
+
+import heapq
+
+
+def luby(i):
+    """Returns the i-th term (from 1) of the Luby sequence 1 1 2 1 1 2 4..."""
+    size = 1
+    while size < i + 1:
+        size = 2 * size + 1
+    while size != i:
+        size //= 2
+        if i > size:
+            i -= size
+        if size == i:
+            break
+    return (size + 1) // 2
+
+
+class Solver():
+
+    # Conflicts before the first restart, scaled by the Luby sequence
+    RESTART_BASE = 100
+
+    # Factor activity bumps grow by after each conflict, which has the
+    # same effect as decaying every other activity
+    ACTIVITY_GROWTH = 1 / 0.95
+
+    # Learnt clauses kept before the longer half is dropped, at least
+    # and as a share of the original clauses, and how much that limit
+    # grows each time
+    LEARNT_MINIMUM = 1000
+    LEARNT_SHARE = 1 / 3
+    LEARNT_GROWTH = 1.1
+
+    def __init__(self):
+        self.variables = 0
+        self.clauses = []
+        self.learnts = []
+        self.learnt_limit = None
+        self.watches = {}
+
+        # literals currently true, and for each variable its decision
+        # level, the clause that implied it, its activity and the value
+        # it last had
+        self.true = set()
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.order = []
+        self.bump = 1.0
+
+        self.trail = []
+        self.trail_limits = []
+        self.propagated = 0
+
+        # False once the clauses are known to be unsatisfiable
+        self.consistent = True
+        self.conflicts = 0
+        self.decisions = 0
+
+    def new_variable(self):
+        """Adds a variable and returns its number."""
+        self.variables += 1
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        self.watches[self.variables] = []
+        self.watches[-self.variables] = []
+        heapq.heappush(self.order, (0.0, self.variables))
+        return self.variables
+
+    def reserve(self, variables):
+        """Makes sure variables 1 to variables exist."""
+        while self.variables < variables:
+            self.new_variable()
+
+    def literal_value(self, literal):
+        """Returns 1, -1 or 0 for a true, false or unassigned literal."""
+        if literal in self.true:
+            return 1
+        if -literal in self.true:
+            return -1
+        return 0
+
+    def add_clause(self, literals):
+        """Adds a clause, a disjunction of literals."""
+        if not self.consistent:
+            return
+        self.backtrack(0)
+        clause = []
+        for literal in literals:
+            self.reserve(abs(literal))
+            value = self.literal_value(literal)
+            if value == 1 or -literal in clause:
+                return
+            if value == 0 and literal not in clause:
+                clause.append(literal)
+        if not clause:
+            self.consistent = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.consistent = False
+        else:
+            self.attach(clause)
+
+    def attach(self, clause, learnt=False):
+        (self.learnts if learnt else self.clauses).append(clause)
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.true.add(literal)
+        self.level[variable] = len(self.trail_limits)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """Assigns every unit literal, returning a conflicting clause or None."""
+        true = self.true
+        watches = self.watches
+        while self.propagated < len(self.trail):
+            false = -self.trail[self.propagated]
+            self.propagated += 1
+            watching = watches[false]
+            kept = []
+            conflict = None
+            for index, clause in enumerate(watching):
+                # keep the false literal second
+                first = clause[0]
+                if first == false:
+                    first = clause[0] = clause[1]
+                    clause[1] = false
+                if first in true:
+                    kept.append(clause)
+                    continue
+                for i in range(2, len(clause)):
+                    if -clause[i] not in true:
+                        clause[1], clause[i] = clause[i], false
+                        watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if -first in true:
+                        conflict = clause
+                        kept.extend(watching[index + 1:])
+                        break
+                    self.assign(first, clause)
+            watches[false] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """Returns the first-UIP clause learnt from conflict, and the level
+        to jump back to."""
+        current = len(self.trail_limits)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        literal = None
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                variable = abs(other)
+                if variable in seen or self.level[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.activity[variable] += self.bump
+                if self.level[variable] == current:
+                    pending += 1
+                else:
+                    learnt.append(other)
+            # the next literal of the current level on the trail
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+            seen.discard(abs(literal))
+        learnt[0] = -literal
+
+        # drop literals whose falsity the others already imply
+        learnt = learnt[:1] + [
+            other for other in learnt[1:]
+            if self.reason[abs(other)] is None or any(
+                abs(implying) not in seen and self.level[abs(implying)] > 0
+                for implying in self.reason[abs(other)] if implying != -other)]
+
+        self.bump *= self.ACTIVITY_GROWTH
+        if self.bump > 1e100:
+            self.rescale()
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # watch the literal from the highest earlier level second
+        deepest = max(range(1, len(learnt)),
+                      key=lambda i: self.level[abs(learnt[i])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def rescale(self):
+        """Shrinks every activity before they overflow."""
+        for variable in range(1, self.variables + 1):
+            self.activity[variable] *= 1e-100
+        self.bump *= 1e-100
+        self.order = [(-self.activity[variable], variable)
+                      for variable in range(1, self.variables + 1)]
+        heapq.heapify(self.order)
+
+    def reduce(self):
+        """Drops the longer half of the learnt clauses once there are too
+        many. Only called at level 0, where analyze needs no reasons."""
+        if self.learnt_limit is None:
+            self.learnt_limit = max(self.LEARNT_MINIMUM,
+                                    len(self.clauses) * self.LEARNT_SHARE)
+        if len(self.learnts) <= self.learnt_limit:
+            return
+        self.learnt_limit *= self.LEARNT_GROWTH
+        self.learnts.sort(key=len)
+        del self.learnts[len(self.learnts) // 2:]
+        for literal in self.watches:
+            self.watches[literal] = []
+        for clause in self.clauses + self.learnts:
+            self.watches[clause[0]].append(clause)
+            self.watches[clause[1]].append(clause)
+
+    def backtrack(self, level):
+        """Undoes every assignment above level."""
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phase[variable] = literal > 0
+            self.true.discard(literal)
+            self.reason[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.propagated = start
+
+    def pick(self):
+        """Returns the unassigned variable with the highest activity, or None."""
+        while self.order:
+            activity, variable = heapq.heappop(self.order)
+            if (-activity == self.activity[variable]
+                    and variable not in self.true
+                    and -variable not in self.true):
+                return variable
+        for variable in range(1, self.variables + 1):
+            if variable not in self.true and -variable not in self.true:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """Returns True if the clauses, together with the assumed literals,
+        are satisfiable, leaving a satisfying assignment in model()."""
+        if not self.consistent:
+            return False
+        for literal in assumptions:
+            self.reserve(abs(literal))
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.consistent = False
+            return False
+
+        restarts = 1
+        budget = self.RESTART_BASE * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_limits:
+                    self.consistent = False
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.attach(learnt, learnt=True)
+                    self.assign(learnt[0], learnt)
+                budget -= 1
+                continue
+
+            if budget <= 0:
+                restarts += 1
+                budget = self.RESTART_BASE * luby(restarts)
+                self.backtrack(0)
+                self.reduce()
+                continue
+
+            # assumptions are decided first, one level each
+            depth = len(self.trail_limits)
+            if depth < len(assumptions):
+                literal = assumptions[depth]
+                value = self.literal_value(literal)
+                if value == -1:
+                    self.backtrack(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value == 0:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.pick()
+            if variable is None:
+                return True
+            self.decisions += 1
+            self.trail_limits.append(len(self.trail))
+            self.assign(variable if self.phase[variable] else -variable, None)
+
+    def model(self):
+        """Returns the set of true literals of the last satisfying assignment,
+        one per variable."""
+        return {variable if variable in self.true else -variable
+                for variable in range(1, self.variables + 1)}